@@ -0,0 +1,20 @@
+# benchmarks/bench_utils.py
+# 여러 벤치마크가 함께 쓰는 측정 도우미입니다. 봇 모듈을 불러오지 않습니다.
+import statistics
+
+
+def percentiles(samples_ns):
+    # 나노초 단위 측정값을 마이크로초 단위 요약으로 바꿉니다.
+    samples = sorted(samples_ns)
+
+    def pick(q):
+        return samples[min(len(samples) - 1, int(len(samples) * q))] / 1000
+
+    return {
+        'count': len(samples),
+        'mean_us': statistics.fmean(samples) / 1000,
+        'p50_us': pick(0.50),
+        'p90_us': pick(0.90),
+        'p99_us': pick(0.99),
+        'max_us': samples[-1] / 1000,
+    }
@@ -0,0 +1,437 @@
+# benchmarks/lostark_load_test.py
+# 로스트아크 닉네임 갱신 흐름(fetch_lostark_info → update_nicknames → 닉네임 변경 대기열)을
+# 실제 사이트와 디스코드 없이 부하 테스트합니다.
+#
+# 저장해 둔 프로필 페이지(benchmarks/fixtures/)를 돌려주는 가짜 Stove 서버를 로컬에 띄우고,
+# 가짜 서버/멤버 객체에 수천 명의 등록을 만들어 한 바퀴(모든 캐릭터를 한 번씩 확인)를 도는 데 걸리는
+# 시간, 사이트로 보낸 동시 요청 수, 메모리, 닉네임 변경 횟수를 잽니다.
+#
+# 사용법 (저장소 루트에서):
+#   python benchmarks/lostark_load_test.py
+#   python benchmarks/lostark_load_test.py --users 5000 --guilds 20 --latency 0.2 --error-rate 0.05 --rate-limit-rate 0.02
+#   python benchmarks/lostark_load_test.py --max-rps 15 --host-interval 0 --output /tmp/load.json
+#   python benchmarks/lostark_load_test.py --serve --port 8080   # 가짜 서버만 실행
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+import zlib
+from collections import Counter, deque
+from types import SimpleNamespace
+from urllib.parse import quote
+
+from aiohttp import web
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import discord  # noqa: E402
+
+import lostark_features  # noqa: E402
+from user_store import UserDataStore  # noqa: E402
+from bench_utils import percentiles  # noqa: E402
+
+FIXTURE = os.path.join(ROOT, 'benchmarks', 'fixtures', 'stove_profile.html')
+MISSING_FIXTURE = os.path.join(ROOT, 'benchmarks', 'fixtures', 'stove_profile_missing.html')
+
+# 고정 페이지에서 캐릭터마다 바꿔 끼울 부분
+FIXTURE_CLASS = 'alt="바드"'
+FIXTURE_LEVEL = '<span><small>Lv.</small>1,640.83</span></div>'
+
+CLASSES = ['바드', '버서커', '디스트로이어', '워로드', '홀리나이트', '배틀마스터', '인파이터', '기공사',
+           '창술사', '데빌헌터', '블래스터', '호크아이', '스카우터', '소서리스', '아르카나', '서머너',
+           '블레이드', '데모닉', '리퍼', '도화가', '기상술사']
+
+
+class MockStoveServer:
+    """저장해 둔 프로필 페이지를 지연, 오류, 요청 제한(429)과 함께 돌려주는 가짜 Stove 서버입니다."""
+
+    def __init__(self, latency=0.05, jitter=0.02, error_rate=0.0, rate_limit_rate=0.0, max_rps=0,
+                 retry_after=1, missing_rate=0.0, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.max_rps = max_rps  # 0이 아니면 1초 동안 이보다 많은 요청에는 429를 돌려줍니다.
+        self.retry_after = retry_after
+        self.missing_rate = missing_rate
+        self.rng = random.Random(seed)
+        self.level_bumps = Counter()  # 캐릭터 이름 -> 올라간 레벨 (정보가 바뀐 캐릭터 흉내)
+        self.recent = deque()  # max_rps 계산용 최근 요청 시각
+
+        with open(FIXTURE, 'r', encoding='utf-8') as file:
+            page = file.read()
+        with open(MISSING_FIXTURE, 'r', encoding='utf-8') as file:
+            self.missing_page = file.read().encode('utf-8')
+        # 요청마다 전체 페이지를 치환하지 않도록 바꿔 끼울 자리를 기준으로 미리 잘라 둡니다.
+        head, rest = page.split(FIXTURE_CLASS, 1)
+        middle, tail = rest.split(FIXTURE_LEVEL, 1)
+        self.parts = [part.encode('utf-8') for part in (head, middle, tail)]
+
+        self.runner = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.statuses = Counter()
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.bytes_sent = 0
+
+    def profile(self, character_name):
+        # 이름에서 정해지는 (클래스, 레벨)이라 실행할 때마다 같은 값이 나옵니다.
+        digest = zlib.crc32(character_name.encode('utf-8'))
+        level = 1400 + digest % 300 + self.level_bumps[character_name]
+        return CLASSES[digest % len(CLASSES)], f"{level:,}.{digest % 100:02d}"
+
+    def render(self, character_name):
+        loaclass, loalevel = self.profile(character_name)
+        return b''.join((
+            self.parts[0], f'alt="{loaclass}"'.encode('utf-8'),
+            self.parts[1], f'<span><small>Lv.</small>{loalevel}</span></div>'.encode('utf-8'),
+            self.parts[2],
+        ))
+
+    def over_rps(self):
+        if not self.max_rps:
+            return False
+        now = time.monotonic()
+        while self.recent and self.recent[0] <= now - 1:
+            self.recent.popleft()
+        self.recent.append(now)
+        return len(self.recent) > self.max_rps
+
+    async def handle_profile(self, request):
+        self.requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter)))
+            roll = self.rng.random()
+            if self.over_rps() or roll < self.rate_limit_rate:
+                response = web.Response(status=429, headers={'Retry-After': str(self.retry_after)})
+            elif roll < self.rate_limit_rate + self.error_rate:
+                response = web.Response(status=503)
+            elif roll < self.rate_limit_rate + self.error_rate + self.missing_rate:
+                response = web.Response(body=self.missing_page, content_type='text/html')
+            else:
+                response = web.Response(body=self.render(request.match_info['name']), content_type='text/html')
+            self.statuses[response.status] += 1
+            self.bytes_sent += len(response.body or b'')
+            return response
+        finally:
+            self.in_flight -= 1
+
+    def app(self):
+        app = web.Application()
+        app.router.add_get('/Profile/Character/{name}', self.handle_profile)
+        return app
+
+    async def start(self, host='127.0.0.1', port=0):
+        """서버를 띄우고 기본 주소(http://host:port)를 반환합니다. port가 0이면 빈 포트를 씁니다."""
+        self.runner = web.AppRunner(self.app(), access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, host, port)
+        await site.start()
+        host, port = self.runner.addresses[0][:2]
+        return f"http://{host}:{port}"
+
+    async def stop(self):
+        if self.runner is not None:
+            await self.runner.cleanup()
+            self.runner = None
+
+    def stats(self):
+        return {
+            'requests': self.requests,
+            'statuses': {str(status): count for status, count in sorted(self.statuses.items())},
+            'max_in_flight': self.max_in_flight,
+            'bytes_sent': self.bytes_sent,
+        }
+
+
+# 닉네임 변경이 429로 거절될 때 discord.HTTPException에 넘길 응답 흉내
+RATE_LIMITED_RESPONSE = SimpleNamespace(status=429, reason='Too Many Requests', headers={'Retry-After': '0'})
+
+
+class FakeMember:
+    def __init__(self, user_id, stats, edit_latency, edit_429_rate, rng):
+        self.id = user_id
+        self.name = f"user{user_id}"
+        self.nick = None
+        self.stats = stats
+        self.edit_latency = edit_latency
+        self.edit_429_rate = edit_429_rate
+        self.rng = rng
+
+    async def edit(self, nick):
+        await asyncio.sleep(self.edit_latency)
+        if self.rng.random() < self.edit_429_rate:
+            self.stats['edit_429'] += 1
+            raise discord.HTTPException(RATE_LIMITED_RESPONSE, 'You are being rate limited.')
+        self.nick = nick
+        self.stats['edits'] += 1
+
+
+class FakeGuild:
+    """get_member는 캐시에 있는 멤버만, query_members/fetch_member는 지연 후 모든 멤버를 찾습니다."""
+
+    def __init__(self, guild_id, members, cached_ids, stats, gateway_latency):
+        self.id = guild_id
+        self.name = f"guild{guild_id}"
+        self.members = members
+        self.cache = {user_id: members[user_id] for user_id in cached_ids}
+        self.stats = stats
+        self.gateway_latency = gateway_latency
+
+    def get_member(self, user_id):
+        return self.cache.get(user_id)
+
+    async def query_members(self, user_ids, limit, cache):
+        self.stats['member_queries'] += 1
+        await asyncio.sleep(self.gateway_latency)
+        found = [self.members[user_id] for user_id in user_ids[:limit] if user_id in self.members]
+        if cache:
+            self.cache.update({member.id: member for member in found})
+        return found
+
+    async def fetch_member(self, user_id):
+        self.stats['fetch_member'] += 1
+        await asyncio.sleep(self.gateway_latency)
+        return self.members[user_id]
+
+
+class FakeBot:
+    def __init__(self, guilds):
+        self.guilds = {guild.id: guild for guild in guilds}
+
+    async def wait_until_ready(self):
+        pass
+
+    def get_guild(self, guild_id):
+        return self.guilds.get(guild_id)
+
+
+class CountingScheduler(lostark_features.RefreshScheduler):
+    def __init__(self, stats, **kwargs):
+        super().__init__(**kwargs)
+        self.stats = stats
+
+    def record(self, character_name, info):
+        self.stats['checked'] += 1
+        if info[0] is None:
+            self.stats['fetch_failed'] += 1
+        super().record(character_name, info)
+
+
+class CountingEditQueue(lostark_features.NicknameEditQueue):
+    def __init__(self, stats, **kwargs):
+        super().__init__(**kwargs)
+        self.stats = stats
+
+    def put(self, key, member, character_name, fingerprint, attempt=0):
+        self.stats['edits_queued'] += 1
+        super().put(key, member, character_name, fingerprint, attempt)
+
+
+def build_registrations(args, stats):
+    # 사용자 i는 서버 (i % guilds)에 있고 캐릭터 (i % characters)를 등록합니다.
+    rng = random.Random(args.seed)
+    registrations = {}
+    members_by_guild = {}
+    for index in range(args.users):
+        user_id = 100000 + index
+        guild_id = 1 + index % args.guilds
+        registrations[(user_id, guild_id)] = {"character_name": f"캐릭터{index % args.characters}"}
+        members_by_guild.setdefault(guild_id, {})[user_id] = FakeMember(
+            user_id, stats, args.edit_latency, args.edit_429_rate, rng,
+        )
+
+    guilds = []
+    for guild_id, members in members_by_guild.items():
+        cached_ids = [user_id for user_id in members if rng.random() < args.cached_members]
+        guilds.append(FakeGuild(guild_id, members, cached_ids, stats, args.gateway_latency))
+    return registrations, guilds
+
+
+async def run_sweep(server, stats):
+    """모든 캐릭터를 한 번씩 확인할 때까지 update_nicknames를 쉬지 않고 반복 실행합니다."""
+    server.reset_stats()
+    stats.clear()
+    # 새 스케줄러는 모든 캐릭터를 바로 확인할 대상으로 잡습니다.
+    scheduler = CountingScheduler(stats)
+    lostark_features.refresh_scheduler = scheduler
+
+    tick_samples = []
+    start = time.perf_counter()
+    while True:
+        tick_start = time.perf_counter_ns()
+        await lostark_features.update_nicknames.coro()
+        tick_samples.append(time.perf_counter_ns() - tick_start)
+        now = time.monotonic()
+        if not any(due is not None and due <= now for due in scheduler.due_times.values()):
+            break
+    fetch_seconds = time.perf_counter() - start
+
+    # 대기열에 남은 닉네임 변경이 모두 끝날 때까지 기다립니다.
+    worker = lostark_features.nickname_edit_queue.worker
+    if worker is not None:
+        await worker
+    total_seconds = time.perf_counter() - start
+
+    return {
+        'ticks': len(tick_samples),
+        'tick_latency': percentiles(tick_samples),
+        'fetch_seconds': fetch_seconds,
+        'total_seconds': total_seconds,
+        'characters_per_second': stats['checked'] / fetch_seconds if fetch_seconds else 0,
+        'counts': dict(stats),
+        'server': server.stats(),
+    }
+
+
+async def run(args):
+    logging.getLogger().setLevel(args.log_level)
+    server = MockStoveServer(
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate, max_rps=args.max_rps, retry_after=args.retry_after,
+        missing_rate=args.missing_rate, seed=args.seed,
+    )
+    base_url = await server.start()
+
+    stats = Counter()
+    registrations, guilds = build_registrations(args, stats)
+
+    # 모듈 전역 설정과 객체를 가짜 서버와 부하 테스트용 값으로 바꿉니다.
+    lostark_features.PROFILE_URL = base_url + "/Profile/Character/{}"
+    lostark_features.FETCH_CONCURRENCY = args.concurrency
+    lostark_features.REFRESH_TICK_BUDGET = args.budget
+    lostark_features.REFRESH_MIN_INTERVAL = 0  # 캐시된 값 대신 매번 서버에서 가져오도록 합니다.
+    lostark_features.fetcher = lostark_features.RateLimitedFetcher(
+        concurrency=args.concurrency, host_interval=args.host_interval, backoff=args.retry_backoff,
+    )
+    lostark_features.character_info_cache = lostark_features.CharacterInfoCache(lostark_features.fetch_lostark_info)
+    lostark_features.nickname_edit_queue = CountingEditQueue(stats, interval=args.edit_interval)
+    lostark_features.user_character_data = registrations
+    lostark_features.bot = FakeBot(guilds)
+
+    if args.tracemalloc:
+        tracemalloc.start()
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    results = {
+        'config': vars(args),
+        'characters': len({data["character_name"] for data in registrations.values()}),
+        'sweeps': [],
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        lostark_features.user_store = UserDataStore(os.path.join(tmp, 'users.db'))
+        lostark_features.user_store.open()
+        try:
+            for sweep in range(args.sweeps):
+                if sweep:
+                    # 일부 캐릭터의 레벨을 올려 정보가 바뀐 경우의 변경 횟수를 봅니다.
+                    names = sorted({data["character_name"] for data in registrations.values()})
+                    for name in random.Random(args.seed + sweep).sample(names, int(len(names) * args.change_rate)):
+                        server.level_bumps[name] += 1
+                result = await run_sweep(server, stats)
+                results['sweeps'].append(result)
+                print_sweep(sweep + 1, result)
+        finally:
+            await lostark_features.shutdown()
+            await server.stop()
+
+    results['max_rss_kb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results['rss_growth_kb'] = results['max_rss_kb'] - rss_before
+    if args.tracemalloc:
+        results['tracemalloc_peak_bytes'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return results
+
+
+def print_sweep(number, result):
+    counts = result['counts']
+    server = result['server']
+    tick = result['tick_latency']
+    print(f"[한 바퀴 {number}] {counts.get('checked', 0):,}개 캐릭터 확인 {result['fetch_seconds']:.2f}s "
+          f"({result['characters_per_second']:.1f}/s, {result['ticks']}회 실행, 실행당 p50 {tick['p50_us'] / 1000:.1f} ms "
+          f"p99 {tick['p99_us'] / 1000:.1f} ms), 변경 완료까지 {result['total_seconds']:.2f}s")
+    print(f"  사이트 요청 {server['requests']:,}회 {server['statuses']}, 최대 동시 요청 {server['max_in_flight']}, "
+          f"가져오기 실패 {counts.get('fetch_failed', 0):,}")
+    print(f"  닉네임 변경 대기열 {counts.get('edits_queued', 0):,}건, 변경 {counts.get('edits', 0):,}건, "
+          f"변경 429 {counts.get('edit_429', 0):,}건, 멤버 요청 {counts.get('member_queries', 0):,}회, "
+          f"fetch_member {counts.get('fetch_member', 0):,}회")
+
+
+async def serve(args):
+    server = MockStoveServer(
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate, max_rps=args.max_rps, retry_after=args.retry_after,
+        missing_rate=args.missing_rate, seed=args.seed,
+    )
+    base_url = await server.start(args.host, args.port)
+    print(f"가짜 Stove 서버 실행 중: {base_url}/Profile/Character/{quote('캐릭터0')} (Ctrl+C로 종료)")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="로스트아크 닉네임 갱신 부하 테스트")
+    parser.add_argument('--users', type=int, default=2000, help="등록된 (사용자, 서버) 수")
+    parser.add_argument('--characters', type=int, help="서로 다른 캐릭터 수 (기본값: 사용자 수)")
+    parser.add_argument('--guilds', type=int, default=10, help="서버 수")
+    parser.add_argument('--sweeps', type=int, default=2, help="모든 캐릭터를 확인하는 바퀴 수")
+    parser.add_argument('--change-rate', type=float, default=0.1, help="두 번째 바퀴부터 레벨이 바뀌는 캐릭터 비율")
+    parser.add_argument('--latency', type=float, default=0.05, help="가짜 서버의 평균 응답 지연 (초)")
+    parser.add_argument('--jitter', type=float, default=0.02, help="응답 지연의 흔들림 폭 (초)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="503을 돌려줄 확률")
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help="무작위로 429를 돌려줄 확률")
+    parser.add_argument('--max-rps', type=int, default=0, help="1초에 이보다 많은 요청에는 429 (0이면 제한 없음)")
+    parser.add_argument('--retry-after', type=int, default=1, help="429 응답의 Retry-After (초)")
+    parser.add_argument('--missing-rate', type=float, default=0.0, help="캐릭터 정보가 없는 페이지를 돌려줄 확률")
+    parser.add_argument('--concurrency', type=int, default=lostark_features.FETCH_CONCURRENCY, help="동시 요청 수")
+    parser.add_argument('--host-interval', type=float, default=lostark_features.HOST_REQUEST_INTERVAL,
+                        help="같은 호스트로 보내는 요청 사이의 최소 간격 (초)")
+    parser.add_argument('--retry-backoff', type=float, default=lostark_features.RETRY_BACKOFF, help="재시도 대기 기준값 (초)")
+    parser.add_argument('--budget', type=int, default=lostark_features.REFRESH_TICK_BUDGET, help="한 번 실행에 확인할 캐릭터 수")
+    parser.add_argument('--cached-members', type=float, default=0.5, help="멤버 캐시에 미리 들어 있는 멤버 비율")
+    parser.add_argument('--gateway-latency', type=float, default=0.05, help="가짜 멤버 요청 지연 (초)")
+    parser.add_argument('--edit-latency', type=float, default=0.0, help="가짜 닉네임 변경 지연 (초)")
+    parser.add_argument('--edit-429-rate', type=float, default=0.0, help="닉네임 변경이 429로 거절될 확률")
+    parser.add_argument('--edit-interval', type=float, default=0.0, help="닉네임 변경 대기열 간격 (초)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--tracemalloc', action='store_true', help="tracemalloc으로 최대 할당량도 잽니다 (느려짐)")
+    parser.add_argument('--log-level', default='ERROR', help="lostark_features 로그 수준")
+    parser.add_argument('--output', help="결과를 저장할 JSON 경로")
+    parser.add_argument('--serve', action='store_true', help="부하 테스트 없이 가짜 서버만 실행")
+    parser.add_argument('--host', default='127.0.0.1', help="--serve로 실행할 때의 주소")
+    parser.add_argument('--port', type=int, default=8080, help="--serve로 실행할 때의 포트")
+    args = parser.parse_args()
+    if args.characters is None:
+        args.characters = args.users
+
+    if args.serve:
+        try:
+            asyncio.run(serve(args))
+        except KeyboardInterrupt:
+            pass
+        return
+
+    results = asyncio.run(run(args))
+    print(f"최대 RSS {results['max_rss_kb'] / 1024:.1f} MB (증가 {results['rss_growth_kb'] / 1024:.1f} MB)")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(results, file, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
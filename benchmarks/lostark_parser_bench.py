@@ -0,0 +1,60 @@
+# benchmarks/lostark_parser_bench.py
+# 저장해 둔 프로필 페이지(benchmarks/fixtures/*.html)로 lostark_parser의 추출 방식들을 비교합니다.
+#
+# 사용법 (저장소 루트에서):
+#   python benchmarks/lostark_parser_bench.py
+#   python benchmarks/lostark_parser_bench.py --repeat 200 --output /tmp/parser.json
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import lostark_parser  # noqa: E402
+from bench_utils import percentiles  # noqa: E402
+
+FIXTURES = os.path.join(ROOT, 'benchmarks', 'fixtures', '*.html')
+
+
+def bench_fixture(path, repeat):
+    with open(path, 'r', encoding='utf-8') as file:
+        html = file.read()
+
+    # bs4 결과를 기준값으로 삼아 다른 방식이 같은 값을 내는지 확인합니다.
+    expected = lostark_parser.extract_with_bs4(html)
+    result = {'bytes': len(html.encode('utf-8')), 'expected': expected, 'backends': {}}
+    for name, extract in lostark_parser.EXTRACTORS.items():
+        samples = []
+        value = None
+        for _ in range(repeat):
+            start = time.perf_counter_ns()
+            value = extract(html)
+            samples.append(time.perf_counter_ns() - start)
+        result['backends'][name] = {'matches_bs4': tuple(value) == tuple(expected), **percentiles(samples)}
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="로스트아크 프로필 추출기 벤치마크")
+    parser.add_argument('--repeat', type=int, default=50, help="페이지별 반복 횟수")
+    parser.add_argument('--output', help="결과를 저장할 JSON 경로")
+    args = parser.parse_args()
+
+    results = {os.path.basename(path): bench_fixture(path, args.repeat) for path in sorted(glob.glob(FIXTURES))}
+    for name, result in results.items():
+        print(f"{name} ({result['bytes']:,} bytes, 기대값 {result['expected']})")
+        for backend, stats in result['backends'].items():
+            mark = 'OK' if stats['matches_bs4'] else '불일치'
+            print(f"  {backend:12s} p50 {stats['p50_us'] / 1000:8.2f} ms  p99 {stats['p99_us'] / 1000:8.2f} ms  [{mark}]")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(results, file, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# benchmarks/tts_decoder_bench.py
+# 음성마다 ffmpeg를 새로 띄우는 FFmpegPCMAudio와 서버별로 계속 띄워 두는 PersistentDecoder의
+# 음성당 시작 지연(첫 20ms 프레임까지)과 CPU 사용량을 비교합니다. ffmpeg가 설치되어 있어야 합니다.
+#
+# 사용법 (저장소 루트에서):
+#   python benchmarks/tts_decoder_bench.py
+#   python benchmarks/tts_decoder_bench.py --clips 50 --duration 0.8 --ffmpeg /usr/bin/ffmpeg
+import argparse
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import discord  # noqa: E402
+
+from tts_decoder import DecodedClip, PersistentDecoder  # noqa: E402
+from tts_pipeline import AudioStream  # noqa: E402
+from bench_utils import percentiles  # noqa: E402
+
+
+def make_clip(ffmpeg, frequency, duration):
+    # gTTS 출력과 같은 형식(24kHz 모노 32kbps mp3, ID3 태그와 Info 프레임 포함)의 짧은 음성을 만듭니다.
+    return subprocess.run(
+        [ffmpeg, '-loglevel', 'error', '-f', 'lavfi', '-i', f'sine=frequency={frequency}:duration={duration}',
+         '-ar', '24000', '-ac', '1', '-b:a', '32k', '-f', 'mp3', 'pipe:1'],
+        capture_output=True, check=True,
+    ).stdout
+
+
+def cpu_seconds():
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime, children.ru_utime + children.ru_stime
+
+
+def play_all(clips, make_source, finish=None):
+    first_frame = []
+    total = []
+    frames = 0
+    own_start, children_start = cpu_seconds()
+    start = time.perf_counter()
+    for clip in clips:
+        clip_start = time.perf_counter_ns()
+        source = make_source(clip)
+        data = source.read()
+        first_frame.append(time.perf_counter_ns() - clip_start)
+        while data:
+            frames += 1
+            data = source.read()
+        process = getattr(source, '_process', None)
+        if process:
+            # 출력을 다 읽은 ffmpeg가 끝날 때까지 기다려야 cleanup이 닫힌 stdin으로 communicate()를 부르지 않습니다.
+            process.wait()
+        source.cleanup()
+        total.append(time.perf_counter_ns() - clip_start)
+    if finish is not None:
+        finish()  # 디코더 프로세스를 정리해야 자식 프로세스 CPU 시간에 잡힙니다.
+    elapsed = time.perf_counter() - start
+    own_end, children_end = cpu_seconds()
+    return {
+        'clips': len(clips),
+        'frames': frames,
+        'seconds': elapsed,
+        'first_frame': percentiles(first_frame),
+        'per_clip': percentiles(total),
+        'cpu_ms_per_clip': {
+            'bot_process': (own_end - own_start) * 1000 / len(clips),
+            'ffmpeg': (children_end - children_start) * 1000 / len(clips),
+        },
+    }
+
+
+def streamed(clip):
+    stream = AudioStream()
+    stream.write(clip)
+    stream.close()
+    return stream
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TTS 디코더 벤치마크")
+    parser.add_argument('--clips', type=int, default=30, help="재생할 음성 수")
+    parser.add_argument('--duration', type=float, default=1.0, help="음성 하나의 길이 (초)")
+    parser.add_argument('--ffmpeg', default='ffmpeg', help="ffmpeg 실행 파일 경로")
+    parser.add_argument('--output', help="결과를 저장할 JSON 경로")
+    args = parser.parse_args()
+
+    clips = [make_clip(args.ffmpeg, 220 + 40 * (index % 10), args.duration) for index in range(args.clips)]
+
+    results = {
+        'per_clip_ffmpeg': play_all(
+            clips, lambda clip: discord.FFmpegPCMAudio(io.BytesIO(clip), pipe=True, executable=args.ffmpeg),
+        ),
+    }
+    decoder = PersistentDecoder(args.ffmpeg)
+    results['persistent_decoder'] = play_all(clips, lambda clip: DecodedClip(decoder, streamed(clip)), decoder.close)
+    results['persistent_decoder']['processes_spawned'] = decoder.spawned
+
+    for name, result in results.items():
+        first = result['first_frame']
+        cpu = result['cpu_ms_per_clip']
+        print(f"{name:20s} 첫 프레임 p50 {first['p50_us'] / 1000:7.2f} ms  p99 {first['p99_us'] / 1000:7.2f} ms  "
+              f"음성당 CPU 봇 {cpu['bot_process']:6.2f} ms + ffmpeg {cpu['ffmpeg']:6.2f} ms  "
+              f"({result['frames']} 프레임, {result['seconds']:.2f}s)")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(results, file, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
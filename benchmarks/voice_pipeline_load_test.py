@@ -0,0 +1,269 @@
+# benchmarks/voice_pipeline_load_test.py
+# TTS 음성 흐름(!말 → 음성 세션 → 합성 작업 프로세스 → 대기열 → 디코더 → 재생)을
+# 실제 디스코드와 네트워크 없이 부하 테스트합니다.
+#
+# 합성은 네트워크를 쓰지 않는 대체 백엔드(silence 또는 tone)로 작업 프로세스 풀에서 하고,
+# 가짜 음성 클라이언트가 디코더 출력을 20ms 프레임 속도로 읽어 재생을 흉내 냅니다.
+# 여러 서버가 동시에 !말을 보낼 때 요청부터 재생 시작까지의 지연, 합성 시간, 대기열에서 합쳐지거나
+# 버려진 요청 수, 그리고 게이트웨이 처리가 밀리는 정도를 보여 주는 이벤트 루프 지연을 잽니다.
+# 디코딩에 ffmpeg가 필요합니다.
+#
+# 사용법 (저장소 루트에서):
+#   python benchmarks/voice_pipeline_load_test.py
+#   python benchmarks/voice_pipeline_load_test.py --guilds 20 --requests 10 --interval 0.5 --stub-delay 0.3
+#   python benchmarks/voice_pipeline_load_test.py --backend tone --workers 2 --threads 2 --speed 4 --ffmpeg /usr/bin/ffmpeg
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import resource
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import voice_management  # noqa: E402
+from tts_worker import TTS_WORKER_THREADS, TTS_WORKERS, TTSWorkerPool  # noqa: E402
+from bench_utils import percentiles  # noqa: E402
+
+FRAME_SECONDS = 0.02  # 디스코드가 음성 프레임 하나를 보내는 간격
+
+WORDS = ['안녕하세요', '오늘', '레이드', '몇 시에', '가나요', '저녁', '먹고', '올게요', '잠깐만', '기다려 주세요',
+         '준비', '됐어요', '출발', '합시다', '수고하셨습니다']
+
+
+class FakeMember:
+    def __init__(self, member_id, guild, bot=False):
+        self.id = member_id
+        self.guild = guild
+        self.bot = bot
+        self.voice = None
+
+
+class FakeChannel:
+    def __init__(self, name, guild):
+        self.name = name
+        self.guild = guild
+        self.members = []
+
+    async def connect(self):
+        voice_client = FakeVoiceClient(self)
+        self.guild.voice_client = voice_client
+        self.members.append(self.guild.me)
+        return voice_client
+
+
+class FakeVoiceClient:
+    # 디스코드 AudioPlayer처럼 별도 스레드에서 20ms마다 프레임 하나를 읽습니다.
+    def __init__(self, channel):
+        self.channel = channel
+        self.guild = channel.guild
+        self.speed = channel.guild.speed
+        self.connected = True
+        self.player = None
+        self.stopped = threading.Event()
+        self.frames = 0
+
+    def is_connected(self):
+        return self.connected
+
+    def is_playing(self):
+        return self.player is not None and self.player.is_alive()
+
+    def is_paused(self):
+        return False
+
+    def play(self, source, after=None):
+        self.stopped.clear()
+
+        def run():
+            start = time.perf_counter()
+            frames = 0
+            error = None
+            try:
+                while not self.stopped.is_set() and source.read():
+                    frames += 1
+                    delay = start + frames * FRAME_SECONDS / self.speed - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+            except Exception as e:
+                error = e
+            finally:
+                source.cleanup()
+                self.frames += frames
+                if after is not None:
+                    after(error)
+
+        self.player = threading.Thread(target=run, daemon=True)
+        self.player.start()
+
+    def stop(self):
+        self.stopped.set()
+
+    async def move_to(self, channel):
+        self.channel.members.remove(self.guild.me)
+        self.channel = channel
+        channel.members.append(self.guild.me)
+
+    async def disconnect(self):
+        self.stop()
+        self.connected = False
+        self.channel.members.remove(self.guild.me)
+        self.guild.voice_client = None
+
+
+class FakeGuild:
+    def __init__(self, guild_id, bot_user, speed):
+        self.id = guild_id
+        self.me = bot_user
+        self.speed = speed
+        self.voice_client = None
+        self.channel = FakeChannel(f"voice-{guild_id}", self)
+        self.author = FakeMember(1000 + guild_id, self)
+        self.author.voice = type('VoiceState', (), {'channel': self.channel})()
+        self.channel.members.append(self.author)
+
+
+class FakeContext:
+    def __init__(self, guild):
+        self.guild = guild
+        self.author = guild.author
+        self.sent = []
+
+    @property
+    def voice_client(self):
+        return self.guild.voice_client
+
+    async def send(self, message):
+        self.sent.append(message)
+
+
+class FakeBot:
+    def __init__(self):
+        self.user = FakeMember(1, None, bot=True)
+
+
+async def measure_loop_lag(lags, interval=0.01):
+    # sleep이 예정보다 얼마나 늦게 깨는지로 이벤트 루프가 밀리는 정도를 잽니다.
+    while True:
+        start = time.perf_counter_ns()
+        await asyncio.sleep(interval)
+        lags.append(max(0, time.perf_counter_ns() - start - int(interval * 1e9)))
+
+
+async def send_requests(cog, guild, args, rng):
+    ctx = FakeContext(guild)
+    for index in range(args.requests):
+        text = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(2, args.max_words)))
+        # 같은 문장이 캐시에 맞지 않도록 서버와 순번을 붙입니다.
+        await voice_management.VoiceManagement.say.callback(cog, ctx, text=f"{text} {guild.id}-{index}")
+        await asyncio.sleep(rng.uniform(0, 2 * args.interval))
+    return ctx.sent
+
+
+def cpu_seconds():
+    # 작업 프로세스와 디코더는 끝나기 전까지 RUSAGE_CHILDREN에 잡히지 않으므로 봇 프로세스만 잽니다.
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    return own.ru_utime + own.ru_stime
+
+
+async def run(args):
+    rng = random.Random(args.seed)
+    bot = FakeBot()
+    cog = voice_management.VoiceManagement(bot)
+    cog.tts_workers.close()
+    cog.tts_workers = TTSWorkerPool(args.backend, args.workers, args.threads, voice_management.TTS_TIMEOUT)
+    guilds = [FakeGuild(guild_id, bot.user, args.speed) for guild_id in range(1, args.guilds + 1)]
+
+    # 작업 프로세스를 미리 띄워 두어 프로세스 시작 시간이 첫 요청 지연에 섞이지 않게 합니다.
+    await asyncio.gather(*(cog.tts_workers.synthesize('준비', 'ko') for _ in range(args.workers)))
+
+    lags = []
+    lag_task = asyncio.create_task(measure_loop_lag(lags))
+    cpu_start = cpu_seconds()
+    start = time.perf_counter()
+    sent = await asyncio.gather(*(send_requests(cog, guild, args, random.Random(rng.random())) for guild in guilds))
+    # 모든 대기열이 비고 재생이 끝날 때까지 기다립니다.
+    while any(len(session.pipeline) or (session.voice_client and session.voice_client.is_playing())
+              for session in cog.sessions.values()):
+        await asyncio.sleep(0.05)
+    elapsed = time.perf_counter() - start
+    cpu_end = cpu_seconds()
+    lag_task.cancel()
+
+    metrics = [metric for session in cog.sessions.values() for metric in session.pipeline.metrics]
+    merged = sum(session.pipeline.merged for session in cog.sessions.values())
+    dropped = sum(session.pipeline.dropped for session in cog.sessions.values())
+    frames = sum(guild.voice_client.frames for guild in guilds if guild.voice_client)
+    await cog.cog_unload()
+
+    def seconds_percentiles(key):
+        values = [int(metric[key] * 1e9) for metric in metrics if metric[key] is not None]
+        return percentiles(values) if values else None
+
+    results = {
+        'backend': args.backend,
+        'workers': args.workers,
+        'threads': args.threads,
+        'guilds': args.guilds,
+        'requests': args.guilds * args.requests,
+        'played': len(metrics),
+        'merged': merged,
+        'dropped': dropped,
+        'errors': sum(len(messages) for messages in sent),
+        'frames': frames,
+        'seconds': elapsed,
+        'first_audio': seconds_percentiles('first_audio'),
+        'first_chunk': seconds_percentiles('first_chunk'),
+        'synthesis': seconds_percentiles('synthesis'),
+        'loop_lag': percentiles(lags) if lags else None,
+        'bot_cpu_seconds': cpu_end - cpu_start,
+    }
+
+    print(f"{results['requests']}개 요청 ({args.guilds}개 서버), 재생 {results['played']}, 합쳐짐 {merged}, "
+          f"버려짐 {dropped}, 오류 메시지 {results['errors']}, {elapsed:.2f}s")
+    for key in ('first_audio', 'first_chunk', 'synthesis', 'loop_lag'):
+        result = results[key]
+        if result:
+            print(f"{key:12s} p50 {result['p50_us'] / 1000:8.2f} ms  p99 {result['p99_us'] / 1000:8.2f} ms  "
+                  f"max {result['max_us'] / 1000:8.2f} ms")
+    print(f"봇 프로세스 CPU {results['bot_cpu_seconds']:.2f}s, 재생한 프레임 {frames}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TTS 음성 흐름 부하 테스트")
+    parser.add_argument('--guilds', type=int, default=10, help="동시에 !말을 보내는 서버 수")
+    parser.add_argument('--requests', type=int, default=5, help="서버 하나가 보내는 !말 수")
+    parser.add_argument('--interval', type=float, default=0.3, help="같은 서버에서 보내는 요청 사이의 평균 간격 (초)")
+    parser.add_argument('--max-words', type=int, default=8, help="요청 하나의 최대 단어 수")
+    parser.add_argument('--backend', default='silence', help="합성 백엔드 (silence, tone 또는 모듈:클래스)")
+    parser.add_argument('--workers', type=int, default=TTS_WORKERS, help="합성 작업 프로세스 수")
+    parser.add_argument('--threads', type=int, default=TTS_WORKER_THREADS, help="작업 프로세스 하나가 동시에 처리하는 작업 수")
+    parser.add_argument('--stub-delay', type=float, default=0.2, help="대체 백엔드가 합성마다 기다리는 시간 (초)")
+    parser.add_argument('--speed', type=float, default=1.0, help="재생 속도 배율 (클수록 빨리 재생)")
+    parser.add_argument('--ffmpeg', help="ffmpeg 실행 파일 경로 (이름이 ffmpeg여야 합니다. 기본값: PATH의 ffmpeg)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--log-level', default='ERROR', help="봇 모듈 로그 수준")
+    parser.add_argument('--output', help="결과를 저장할 JSON 경로")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(args.log_level)
+    # 작업 프로세스와 디코더는 환경 변수와 PATH를 물려받아 설정을 읽습니다.
+    os.environ['TTS_STUB_DELAY'] = str(args.stub_delay)
+    if args.ffmpeg:
+        os.environ['TTS_TONE_FFMPEG'] = args.ffmpeg
+        os.environ['PATH'] = os.path.dirname(os.path.abspath(args.ffmpeg)) + os.pathsep + os.environ.get('PATH', '')
+
+    results = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(results, file, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
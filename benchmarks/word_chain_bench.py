@@ -0,0 +1,206 @@
+# benchmarks/word_chain_bench.py
+# 끝말잇기 엔진의 주요 경로를 디스코드 없이 측정하는 벤치마크입니다.
+#
+# 사용법 (저장소 루트에서):
+#   python benchmarks/word_chain_bench.py                       # 결과를 benchmarks/results/<커밋>.json 에 저장
+#   python benchmarks/word_chain_bench.py --games 200 --turns 50
+#   python benchmarks/word_chain_bench.py --compare benchmarks/results/<이전 커밋>.json
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import lexicon  # noqa: E402
+from bench_utils import percentiles  # noqa: E402
+from word_chain import DIFFICULTIES, WordChainGame  # noqa: E402
+
+WORDS_FILE = os.path.join(ROOT, 'words.txt')
+LEXICON_FILE = os.path.join(ROOT, 'words.lex')
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+
+# 새 프로세스에서 사전을 열 때의 시작 시간과 최대 RSS를 잽니다.
+COLD_START_SCRIPT = """
+import resource, sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+import lexicon
+lx = lexicon.Lexicon({path!r})
+'가렌' in lx
+elapsed = time.perf_counter() - start
+print(elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+
+def time_each(func, inputs):
+    samples = []
+    for value in inputs:
+        start = time.perf_counter_ns()
+        func(value)
+        samples.append(time.perf_counter_ns() - start)
+    return percentiles(samples)
+
+
+def bench_load():
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        target = os.path.join(tmp, 'words.lex')
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        count = lexicon.build_lexicon(WORDS_FILE, target)
+        results['build_seconds'] = time.perf_counter() - start
+        results['build_peak_bytes'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        results['word_count'] = count
+        results['lexicon_bytes'] = os.path.getsize(target)
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        lx = lexicon.Lexicon(target)
+        results['open_seconds'] = time.perf_counter() - start
+        results['open_peak_bytes'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        lx.close()
+
+        output = subprocess.run(
+            [sys.executable, '-c', COLD_START_SCRIPT.format(root=ROOT, path=target)],
+            capture_output=True, text=True, check=True,
+        ).stdout.split()
+        results['cold_start_seconds'] = float(output[0])
+        results['cold_start_max_rss_kb'] = int(output[1])
+    return results
+
+
+def bench_operations(lx, samples):
+    rng = random.Random(42)
+    game = WordChainGame(lx)
+    words = [lx.random_word() for _ in range(samples)]
+    missing = [word[::-1] + '뷁' for word in words]
+    syllables = [word[-1] for word in words]
+
+    results = {
+        'valid_word_hit': time_each(game.valid_word, words),
+        'valid_word_miss': time_each(game.valid_word, missing),
+        'apply_dueum_law': time_each(game.apply_dueum_law, words),
+        'matches_dueum': time_each(lambda word: game.matches_dueum(word, word[0]), words),
+    }
+    for difficulty in DIFFICULTIES:
+        game.difficulty = difficulty
+        random.seed(rng.random())
+        results[f'next_word[{difficulty}]'] = time_each(game.next_word, syllables)
+    return results
+
+
+async def play_game(lx, turns, turn_samples, rng):
+    # 사용자 역할도 봇 엔진(쉬움)으로 흉내 내며, 실제 게임과 같은 검사를 거쳐 단어를 추가합니다.
+    game = WordChainGame(lx)
+    game.difficulty = rng.choice(list(DIFFICULTIES))
+    player = WordChainGame(lx)
+    player.difficulty = '쉬움'
+    game.add_used_word('봇', lx.random_word())
+
+    for _ in range(turns):
+        start = time.perf_counter_ns()
+        player.used_word_set = game.used_word_set
+        word = player.next_word(game.current_word[-1])
+        if word is None or not game.valid_word(word) or not game.matches_dueum(game.current_word, word[0]):
+            break
+        game.add_used_word('사용자', word)
+        bot_word = game.next_word(word[-1])
+        turn_samples.append(time.perf_counter_ns() - start)
+        if bot_word is None:
+            break
+        game.add_used_word('봇', bot_word)
+        # 다른 게임들이 끼어들 수 있도록 이벤트 루프에 양보합니다.
+        await asyncio.sleep(0)
+    return len(game.used_words)
+
+
+async def bench_games(lx, games, turns):
+    rng = random.Random(7)
+    turn_samples = []
+    start = time.perf_counter()
+    played = await asyncio.gather(*(play_game(lx, turns, turn_samples, rng) for _ in range(games)))
+    elapsed = time.perf_counter() - start
+    return {
+        'games': games,
+        'max_turns': turns,
+        'total_words': sum(played),
+        'seconds': elapsed,
+        'turns_per_second': len(turn_samples) / elapsed if elapsed else 0,
+        'turn_latency': percentiles(turn_samples) if turn_samples else None,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def flatten(data, prefix=''):
+    for key, value in data.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            yield from flatten(value, f"{name}.")
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield name, value
+
+
+def compare(current, previous_path):
+    with open(previous_path, 'r', encoding='utf-8') as file:
+        previous = dict(flatten(json.load(file)))
+    print(f"\n{previous_path} 대비 변화:")
+    for name, value in flatten(current):
+        old = previous.get(name)
+        if old:
+            print(f"  {name:45s} {old:14.3f} -> {value:14.3f} ({(value - old) / old * 100:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="끝말잇기 엔진 벤치마크")
+    parser.add_argument('--samples', type=int, default=20000, help="연산별 측정 횟수")
+    parser.add_argument('--games', type=int, default=100, help="동시에 진행할 게임 수")
+    parser.add_argument('--turns', type=int, default=30, help="게임당 최대 차례 수")
+    parser.add_argument('--output', help="결과 JSON 경로 (기본값: benchmarks/results/<커밋>.json)")
+    parser.add_argument('--compare', help="비교할 이전 결과 JSON 경로")
+    args = parser.parse_args()
+
+    commit = git_commit()
+    lx = lexicon.load_lexicon(WORDS_FILE, LEXICON_FILE)
+    results = {
+        'commit': commit,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'load': bench_load(),
+        'operations': bench_operations(lx, args.samples),
+        'concurrent_games': asyncio.run(bench_games(lx, args.games, args.turns)),
+    }
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as file:
+        json.dump(results, file, ensure_ascii=False, indent=2)
+
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+    print(f"\n결과를 {output}에 저장했어요.")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
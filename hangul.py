@@ -0,0 +1,64 @@
+# hangul.py
+# 한글 음절을 초성/중성/종성으로 분해·조합하고, 두음법칙 정규화 표를 미리 만들어 두는 모듈입니다.
+# 표는 모듈을 불러올 때 한 번만 만들어지므로, 실행 중에는 dict 조회만 하면 됩니다.
+
+SYLLABLE_BASE = 0xAC00  # '가'
+SYLLABLE_COUNT = 11172  # '가' ~ '힣'
+MEDIAL_COUNT = 21
+FINAL_COUNT = 28
+
+INITIALS = 'ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ'
+MEDIALS = 'ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ'
+
+# 호환용 한글 자모 범위 (ㄱ ~ ㆎ)
+JAMO_FIRST = 0x3131
+JAMO_LAST = 0x318E
+
+_NIEUN = INITIALS.index('ㄴ')
+_RIEUL = INITIALS.index('ㄹ')
+_IEUNG = INITIALS.index('ㅇ')
+
+# 한글 맞춤법 제10~12항
+# ㄴ, ㄹ + ㅑ ㅕ ㅖ ㅛ ㅠ ㅣ -> ㅇ (녀 -> 여, 량 -> 양, 림 -> 임)
+# ㄹ + ㅏ ㅐ ㅗ ㅚ ㅜ ㅡ -> ㄴ (라 -> 나, 록 -> 녹, 릉 -> 능)
+_TO_IEUNG = {
+    _NIEUN: {MEDIALS.index(v) for v in 'ㅕㅛㅠㅣ'},
+    _RIEUL: {MEDIALS.index(v) for v in 'ㅑㅕㅖㅛㅠㅣ'},
+}
+_TO_NIEUN = {
+    _RIEUL: {MEDIALS.index(v) for v in 'ㅏㅐㅗㅚㅜㅡ'},
+}
+
+
+def is_syllable(char):
+    return SYLLABLE_BASE <= ord(char) < SYLLABLE_BASE + SYLLABLE_COUNT
+
+
+def is_jamo(char):
+    return JAMO_FIRST <= ord(char) <= JAMO_LAST
+
+
+def decompose(syllable):
+    """완성형 음절을 (초성, 중성, 종성) 인덱스로 분해합니다."""
+    code = ord(syllable) - SYLLABLE_BASE
+    return code // (MEDIAL_COUNT * FINAL_COUNT), code // FINAL_COUNT % MEDIAL_COUNT, code % FINAL_COUNT
+
+
+def compose(initial, medial, final=0):
+    return chr(SYLLABLE_BASE + (initial * MEDIAL_COUNT + medial) * FINAL_COUNT + final)
+
+
+def _build_dueum_table():
+    table = {}
+    for code in range(SYLLABLE_COUNT):
+        syllable = chr(SYLLABLE_BASE + code)
+        initial, medial, final = decompose(syllable)
+        if medial in _TO_IEUNG.get(initial, ()):
+            table[syllable] = compose(_IEUNG, medial, final)
+        elif medial in _TO_NIEUN.get(initial, ()):
+            table[syllable] = compose(_NIEUN, medial, final)
+    return table
+
+
+# 두음법칙이 적용되는 음절 -> 적용 후 음절 (종성이 있는 음절 포함). 적용되지 않는 음절은 들어 있지 않습니다.
+DUEUM_LAW = _build_dueum_table()
@@ -0,0 +1,207 @@
+# lexicon.py
+# 끝말잇기 사전을 미리 컴파일한 이진 파일(words.lex)로 만들고, mmap으로 읽어 쓰는 모듈입니다.
+#
+# 파일 구조 (모든 정수는 little-endian uint32):
+#   헤더    : 매직(b'WLEX'), 버전, 단어 수 N
+#   오프셋  : N + 1개의 오프셋 (데이터 영역 기준, i번째 단어는 offsets[i]:offsets[i+1])
+#   데이터  : 정렬된 단어들의 UTF-8 바이트를 이어 붙인 것 (4바이트 단위로 패딩)
+#   출차수  : 음절(가~힣)마다 그 음절로 끝난 단어 뒤에 이어 말할 수 있는 단어 수 (두음법칙 포함)
+#   순위    : 첫 음절이 같은 단어 구간마다, 끝 음절의 출차수가 작은 순서로 정렬한 단어 인덱스
+#
+# 한글 음절은 모두 3바이트 UTF-8이므로 바이트 순서와 문자열 순서가 같고,
+# 덕분에 문자열을 만들지 않고도 이진 탐색과 접두사 범위 검색을 할 수 있습니다.
+import mmap
+import os
+import random
+import re
+import struct
+import sys
+import logging
+from array import array
+
+from hangul import DUEUM_LAW, SYLLABLE_BASE, SYLLABLE_COUNT
+
+WORDS_FILE = 'words.txt'
+LEXICON_FILE = 'words.lex'
+
+MAGIC = b'WLEX'
+VERSION = 3
+HEADER = struct.Struct('<4sII')
+
+# 2~10 음절의 완성형 한글 단어만 사전에 넣습니다.
+VALID_WORD = re.compile(r'^[가-힣]{2,10}$')
+
+# 프로세스당 한 번만 여는 사전 (경로 -> Lexicon)
+_loaded = {}
+
+
+def build_lexicon(source=WORDS_FILE, target=LEXICON_FILE):
+    """words.txt에서 유효한 단어만 골라 정렬한 뒤 이진 사전 파일로 저장합니다."""
+    with open(source, 'r', encoding='utf-8') as file:
+        words = sorted({word for word in (line.strip() for line in file) if VALID_WORD.match(word)})
+
+    offsets = array('I', [0])
+    data = bytearray()
+    for word in words:
+        data += word.encode('utf-8')
+        offsets.append(len(data))
+    data += bytes(-len(data) % 4)
+
+    # 첫 음절별 단어 수와 구간을 구한 뒤, 두음법칙 표(hangul.DUEUM_LAW)를 음절 전체에 한꺼번에 적용해
+    # 대체 음절로 시작하는 단어 수까지 합친 출차수를 계산합니다.
+    starts = [0] * SYLLABLE_COUNT
+    for word in words:
+        starts[ord(word[0]) - SYLLABLE_BASE] += 1
+    degrees = array('I', bytes(4 * SYLLABLE_COUNT))
+    for code in range(SYLLABLE_COUNT):
+        syllable = chr(SYLLABLE_BASE + code)
+        alternative = DUEUM_LAW.get(syllable, syllable)
+        degrees[code] = starts[code]
+        if alternative != syllable:
+            degrees[code] += starts[ord(alternative) - SYLLABLE_BASE]
+
+    # 첫 음절 구간 안에서 끝 음절의 출차수가 작은(상대가 받아치기 어려운) 단어부터 정렬합니다.
+    ranked = array('I')
+    start = 0
+    while start < len(words):
+        end = start
+        while end < len(words) and words[end][0] == words[start][0]:
+            end += 1
+        ranked.extend(sorted(range(start, end), key=lambda i: (degrees[ord(words[i][-1]) - SYLLABLE_BASE], i)))
+        start = end
+
+    if sys.byteorder != 'little':
+        offsets.byteswap()
+        degrees.byteswap()
+        ranked.byteswap()
+
+    # 쓰는 도중에 죽어도 기존 파일이 깨지지 않도록 임시 파일에 쓴 뒤 교체합니다.
+    tmp = f"{target}.tmp"
+    with open(tmp, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION, len(words)))
+        file.write(offsets.tobytes())
+        file.write(data)
+        file.write(degrees.tobytes())
+        file.write(ranked.tobytes())
+    os.replace(tmp, target)
+    logging.info(f"Built lexicon {target} with {len(words)} words from {source}")
+    return len(words)
+
+
+class Lexicon:
+    """mmap으로 연 정렬된 단어 사전. 단어를 조회할 때만 해당 부분을 문자열로 만듭니다."""
+
+    def __init__(self, path=LEXICON_FILE):
+        self.path = path
+        with open(path, 'rb') as file:
+            self._mm = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, count = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path}은(는) 지원하지 않는 사전 파일입니다. (magic={magic!r}, version={version})")
+
+        start = HEADER.size
+        end = start + 4 * (count + 1)
+        self._offsets = self._uint32_view(start, end)
+        self._data_start = end
+        self._count = count
+
+        data_size = self._offsets[count]
+        start = end + data_size + (-data_size % 4)
+        end = start + 4 * SYLLABLE_COUNT
+        self._degrees = self._uint32_view(start, end)
+        self._ranked = self._uint32_view(end, end + 4 * count)
+
+    def _uint32_view(self, start, end):
+        if sys.byteorder == 'little':
+            return memoryview(self._mm)[start:end].cast('I')
+        values = array('I', self._mm[start:end])
+        values.byteswap()
+        return values
+
+    def __len__(self):
+        return self._count
+
+    def _key(self, index):
+        base = self._data_start
+        return self._mm[base + self._offsets[index]:base + self._offsets[index + 1]]
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("lexicon index out of range")
+        return self._key(index).decode('utf-8')
+
+    def _lower_bound(self, key, lo=0, hi=None):
+        if hi is None:
+            hi = self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def __contains__(self, word):
+        key = word.encode('utf-8')
+        index = self._lower_bound(key)
+        return index < self._count and self._key(index) == key
+
+    def prefix_range(self, prefix):
+        """prefix로 시작하는 단어들의 인덱스 범위 (start, end)를 반환합니다."""
+        if not prefix:
+            return 0, self._count
+        start = self._lower_bound(prefix.encode('utf-8'))
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        end = self._lower_bound(upper.encode('utf-8'), start)
+        return start, end
+
+    def random_word(self):
+        return self[random.randrange(self._count)]
+
+    def out_degree(self, syllable):
+        """syllable로 끝난 단어 뒤에 이어 말할 수 있는 단어 수 (두음법칙 대체 음절 포함)."""
+        code = ord(syllable) - SYLLABLE_BASE
+        return self._degrees[code] if 0 <= code < SYLLABLE_COUNT else 0
+
+    def ranked_word_at(self, position):
+        """순위 배열의 position번째 단어를 (끝 음절 출차수, 단어)로 반환합니다."""
+        word = self._key(self._ranked[position]).decode('utf-8')
+        return self.out_degree(word[-1]), word
+
+    def close(self):
+        for view in (self._offsets, self._degrees, self._ranked):
+            if isinstance(view, memoryview):
+                view.release()
+        self._mm.close()
+
+
+def load_lexicon(source=WORDS_FILE, path=LEXICON_FILE):
+    """사전을 프로세스당 한 번만 엽니다. 컴파일된 파일이 없거나 원본보다 오래됐으면 먼저 빌드합니다."""
+    lexicon = _loaded.get(path)
+    if lexicon is not None:
+        return lexicon
+
+    if not os.path.exists(path) or (
+        os.path.exists(source) and os.path.getmtime(source) > os.path.getmtime(path)
+    ):
+        logging.info(f"Lexicon {path} is missing or stale. Building from {source}...")
+        build_lexicon(source, path)
+
+    try:
+        lexicon = Lexicon(path)
+    except ValueError as e:
+        # 예전 형식으로 빌드된 파일이면 다시 빌드합니다.
+        logging.warning(f"{e} Rebuilding from {source}...")
+        build_lexicon(source, path)
+        lexicon = Lexicon(path)
+    _loaded[path] = lexicon
+    return lexicon
+
+
+# 빌드 단계: python lexicon.py [words.txt] [words.lex]
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    build_lexicon(*sys.argv[1:3])
@@ -2,12 +2,17 @@ import discord
 from discord.ext import commands, tasks
 from discord.ui import Button, View
 import aiohttp
-from bs4 import BeautifulSoup
 from urllib.parse import quote
 import logging
-import json
-import os
 import asyncio
+import heapq
+import itertools
+import random
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit
+from lostark_parser import extract_profile
+from user_store import UserDataStore
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO)
@@ -16,57 +21,147 @@ logging.basicConfig(level=logging.INFO)
 # 새로운 데이터 구조: (user_id, guild_id) 튜플을 키로 사용
 user_character_data = {}
 
-# JSON 파일 경로 (쓰기 권한이 있는 경로로 변경)
+# 예전에 쓰던 JSON 파일 경로 (처음 실행할 때 한 번만 SQLite 저장소로 옮깁니다)
 USER_DATA_FILE = 'user_character_data.json'
 
-# JSON 파일에서 데이터 로드
+# 등록 정보를 저장하는 SQLite 저장소 (경로는 환경 변수 USER_DB_FILE로 바꿀 수 있습니다)
+user_store = UserDataStore()
+
+# 로스트아크 캐릭터 프로필 주소
+PROFILE_URL = "https://lostark.game.onstove.com/Profile/Character/{}"
+
+# HTTP 요청 설정
+HTTP_TIMEOUT = 10  # 요청 하나의 전체 제한 시간 (초)
+FETCH_CONCURRENCY = 8  # 동시에 보낼 수 있는 최대 요청 수
+HOST_REQUEST_INTERVAL = 0.05  # 같은 호스트로 보내는 요청 사이의 최소 간격 (초)
+FETCH_RETRIES = 3  # 일시적인 오류(429, 5xx, 타임아웃)일 때 다시 시도하는 횟수
+RETRY_BACKOFF = 1.0  # 재시도 대기 시간의 기준값 (시도할 때마다 두 배)
+
+# 캐릭터 정보 캐시 설정 (초 단위)
+CACHE_TTL = 600  # 가져온 정보를 그대로 쓰는 시간
+CACHE_STALE_TTL = 3600  # TTL이 지난 뒤에도 이 시간 동안은 이전 값을 바로 돌려주고 백그라운드에서 갱신
+CACHE_NEGATIVE_TTL = 120  # 캐릭터가 없거나 가져오지 못한 결과를 기억하는 시간
+CACHE_MAX_SIZE = 1000  # 캐시에 보관할 최대 캐릭터 수 (가장 오래 쓰지 않은 것부터 제거)
+
+# 닉네임 갱신 스케줄 설정 (초 단위)
+REFRESH_TICK_INTERVAL = 30  # 갱신 작업이 깨어나는 간격
+REFRESH_TICK_BUDGET = 30  # 한 번 깨어날 때 확인할 최대 캐릭터 수 (사이트로 보내는 요청 수 상한)
+REFRESH_MIN_INTERVAL = 60  # 최근에 정보가 바뀐 캐릭터를 다시 확인하는 간격
+REFRESH_MAX_INTERVAL = 3600  # 오랫동안 바뀌지 않은 캐릭터를 확인하는 최대 간격
+REFRESH_BACKOFF = 2  # 정보가 바뀌지 않을 때마다 확인 간격을 몇 배로 늘릴지
+
+MEMBER_QUERY_BATCH = 100  # 게이트웨이 멤버 요청 한 번으로 찾을 수 있는 최대 인원
+
+# 닉네임 변경 대기열 설정
+NICKNAME_EDIT_INTERVAL = 1.0  # 닉네임 변경 요청 사이의 간격 (초)
+NICKNAME_EDIT_RETRIES = 3  # 요청 제한(429)에 걸렸을 때 다시 시도하는 횟수
+
+# 저장소에서 데이터 로드 (예전 JSON 파일이 있으면 먼저 옮깁니다)
 def load_user_data():
     global user_character_data
-    if os.path.exists(USER_DATA_FILE):
-        try:
-            with open(USER_DATA_FILE, 'r') as file:
-                user_character_data = {tuple(map(int, k.split('-'))): v for k, v in json.load(file).items()}
-                logging.info("User character data loaded from file.")
-        except Exception as e:
-            logging.error(f"Error loading user data: {e}")
-    else:
-        logging.info("No user data file found. Starting with an empty data set.")
+    try:
+        user_store.open()
+        user_store.migrate_json(USER_DATA_FILE)
+        user_character_data = user_store.load_all()
+        logging.info(f"User character data loaded from {user_store.path} ({len(user_character_data)} registrations).")
+    except Exception as e:
+        logging.error(f"Error loading user data: {e}")
 
-# JSON 파일에 데이터 저장
-def save_user_data():
+# 등록 정보 한 건만 저장합니다. 등록이 해제되어 데이터가 없으면 삭제합니다.
+def save_user_data(key):
     try:
-        with open(USER_DATA_FILE, 'w') as file:
-            json.dump({f"{k[0]}-{k[1]}": v for k, v in user_character_data.items()}, file)
-            logging.info("User character data saved to file.")
+        user_store.save(key, user_character_data.get(key))
     except Exception as e:
         logging.error(f"Error saving user data: {e}")
 
+# 모듈 전체가 함께 쓰는 HTTP 세션 (연결 재사용, DNS 캐시)
+_session = None
+
+async def get_session():
+    global _session
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(limit=FETCH_CONCURRENCY, ttl_dns_cache=300, keepalive_timeout=60)
+        _session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=HTTP_TIMEOUT))
+    return _session
+
+# 봇이 종료될 때 세션을 닫습니다.
+async def close_session():
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+# 봇이 종료될 때 HTTP 세션을 닫고, 남은 저장 작업을 마친 뒤 저장소를 닫습니다.
+async def shutdown():
+    await close_session()
+    await asyncio.to_thread(user_store.close)
+
+# 동시 요청 수와 호스트별 요청 간격을 제한하고, 일시적인 오류는 점점 길게 기다리며 다시 시도하는 요청기
+class RateLimitedFetcher:
+    def __init__(self, concurrency=FETCH_CONCURRENCY, host_interval=HOST_REQUEST_INTERVAL,
+                 retries=FETCH_RETRIES, backoff=RETRY_BACKOFF):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.host_interval = host_interval
+        self.retries = retries
+        self.backoff = backoff
+        self.host_next_time = {}  # 호스트 -> 다음 요청을 보낼 수 있는 시각
+
+    async def wait_for_host(self, host):
+        # 요청 시각을 미리 예약해 두므로 잠금 없이도 호스트별 간격이 지켜집니다.
+        now = time.monotonic()
+        scheduled = max(now, self.host_next_time.get(host, 0))
+        self.host_next_time[host] = scheduled + self.host_interval
+        if scheduled > now:
+            await asyncio.sleep(scheduled - now)
+
+    def delay_host(self, host, delay):
+        self.host_next_time[host] = max(self.host_next_time.get(host, 0), time.monotonic() + delay)
+
+    async def fetch_text(self, url):
+        host = urlsplit(url).hostname
+        for attempt in range(self.retries + 1):
+            delay = self.backoff * (2 ** attempt) * random.uniform(0.8, 1.2)
+            async with self.semaphore:
+                await self.wait_for_host(host)
+                try:
+                    session = await get_session()
+                    async with session.get(url) as res:
+                        if res.status == 200:
+                            return await res.text()
+                        if res.status != 429 and res.status < 500:
+                            logging.error(f"HTTP 요청 오류: 상태 코드 {res.status} ({url})")
+                            return None
+                        logging.warning(f"HTTP 요청 오류: 상태 코드 {res.status} ({url}), 시도 {attempt + 1}/{self.retries + 1}")
+                        retry_after = res.headers.get('Retry-After')
+                        if res.status == 429:
+                            if retry_after and retry_after.isdigit():
+                                delay = float(retry_after)
+                            # 요청 제한에 걸렸으면 같은 호스트로 가는 다른 요청도 함께 기다리게 합니다.
+                            self.delay_host(host, delay)
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    logging.warning(f"HTTP 요청 실패 ({url}), 시도 {attempt + 1}/{self.retries + 1}: {e!r}")
+
+            if attempt < self.retries:
+                await asyncio.sleep(delay)
+
+        logging.error(f"HTTP 요청을 {self.retries + 1}번 시도했지만 실패했어요: {url}")
+        return None
+
+fetcher = RateLimitedFetcher()
+
 # 로스트아크 캐릭터 정보를 가져오는 함수
 async def fetch_lostark_info(character_name):
     try:
-        qtext = quote(character_name)
-        url = f"https://lostark.game.onstove.com/Profile/Character/{qtext}"
-        
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as res:
-                if res.status != 200:
-                    logging.error(f"HTTP 요청 오류: 상태 코드 {res.status}")
-                    return None, None
-                html = await res.text()
-        
-        # 'html.parser'를 사용하여 HTML을 파싱합니다.
-        soup = BeautifulSoup(html, 'html.parser')
+        url = PROFILE_URL.format(quote(character_name))
+        html = await fetcher.fetch_text(url)
+        if html is None:
+            return None, None
 
-        # 선택자 확인 및 예외 처리
-        loaclass_element = soup.select_one('#lostark-wrapper > div > main > div > div.profile-character-info > img')
-        loalevel_element = soup.select_one('#lostark-wrapper > div > main > div > div.profile-ingame > div.profile-info > div.level-info2 > div.level-info2__expedition > span:nth-child(2)')
-        
-        if loaclass_element is None or loalevel_element is None:
+        # 페이지가 커서 파싱이 이벤트 루프를 막지 않도록 작업 스레드에서 추출합니다.
+        loaclass, loalevel = await asyncio.to_thread(extract_profile, html)
+        if loaclass is None or loalevel is None:
             logging.error("HTML 구조가 예상과 다릅니다. 선택자를 확인해주세요.")
             return None, None
-        
-        loaclass = loaclass_element.get('alt', 'Unknown Class')
-        loalevel = loalevel_element.text.replace("Lv.", "").replace(",", "").strip()  # 쉼표 제거 및 공백 제거
 
         logging.info(f"Fetched info for {character_name}: Class = {loaclass}, Level = {loalevel}")
         
@@ -76,6 +171,132 @@ async def fetch_lostark_info(character_name):
         logging.error(f"로스트아크 캐릭터 정보를 가져오는 중 오류 발생: {e}")
         return None, None
 
+# 캐릭터 이름별로 (클래스, 레벨)을 보관하는 캐시
+class CharacterInfoCache:
+    def __init__(self, fetch, ttl=CACHE_TTL, stale_ttl=CACHE_STALE_TTL,
+                 negative_ttl=CACHE_NEGATIVE_TTL, max_size=CACHE_MAX_SIZE):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.negative_ttl = negative_ttl
+        self.max_size = max_size
+        self.entries = OrderedDict()  # 캐릭터 이름 -> ((클래스, 레벨), 가져온 시각)
+        self.pending = {}  # 캐릭터 이름 -> 진행 중인 조회 작업 (같은 캐릭터를 동시에 두 번 조회하지 않도록)
+
+    async def get(self, character_name, max_age=None):
+        # max_age를 주면 그보다 오래된 값은 쓰지 않고 바로 다시 가져옵니다.
+        entry = self.entries.get(character_name)
+        if entry:
+            info, fetched_at = entry
+            age = time.monotonic() - fetched_at
+            self.entries.move_to_end(character_name)
+            if max_age is not None and age >= max_age:
+                pass
+            elif info[0] is None:
+                if age < self.negative_ttl:
+                    return info
+            elif age < self.ttl:
+                return info
+            elif max_age is None and age < self.ttl + self.stale_ttl:
+                # 오래된 값을 바로 돌려주고, 갱신은 백그라운드에서 진행합니다.
+                self.refresh(character_name)
+                return info
+        # 여러 호출이 같은 조회 작업을 기다리므로, 한 호출이 취소되어도 작업 자체는 취소되지 않게 합니다.
+        return await asyncio.shield(self.refresh(character_name))
+
+    def refresh(self, character_name):
+        task = self.pending.get(character_name)
+        if task is None:
+            task = asyncio.create_task(self._fetch(character_name))
+            self.pending[character_name] = task
+        return task
+
+    async def _fetch(self, character_name):
+        try:
+            info = await self.fetch(character_name)
+            self.entries[character_name] = (info, time.monotonic())
+            self.entries.move_to_end(character_name)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+            return info
+        finally:
+            del self.pending[character_name]
+
+
+character_info_cache = CharacterInfoCache(fetch_lostark_info)
+
+# 캐시를 거쳐 캐릭터 정보를 가져옵니다. 같은 캐릭터를 여러 번 조회해도 사이트에는 한 번만 요청합니다.
+async def get_lostark_info(character_name, max_age=None):
+    return await character_info_cache.get(character_name, max_age)
+
+# 캐릭터마다 다음 확인 시각을 힙으로 관리하는 스케줄러
+# 정보가 바뀐 캐릭터는 자주, 오래 그대로인 캐릭터는 점점 드물게 확인합니다.
+class RefreshScheduler:
+    def __init__(self, min_interval=REFRESH_MIN_INTERVAL, max_interval=REFRESH_MAX_INTERVAL, backoff=REFRESH_BACKOFF):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.heap = []  # (예정 시각, 순번, 캐릭터 이름)
+        self.due_times = {}  # 캐릭터 이름 -> 예정 시각 (확인 중이면 None). 힙에서 이 값과 다른 항목은 무시합니다.
+        self.intervals = {}  # 캐릭터 이름 -> 현재 확인 간격
+        self.last_info = {}  # 캐릭터 이름 -> 마지막으로 확인한 (클래스, 레벨)
+        self.counter = itertools.count()
+
+    def schedule(self, character_name, due):
+        self.due_times[character_name] = due
+        heapq.heappush(self.heap, (due, next(self.counter), character_name))
+
+    def bump(self, character_name):
+        # 수동 등록처럼 바로 확인해야 하는 캐릭터는 다음 실행에서 가장 먼저 확인합니다.
+        self.intervals[character_name] = self.min_interval
+        self.schedule(character_name, float('-inf'))
+
+    def remove(self, character_name):
+        self.due_times.pop(character_name, None)
+        self.intervals.pop(character_name, None)
+        self.last_info.pop(character_name, None)
+
+    def sync(self, character_names):
+        # 새로 등록된 캐릭터는 바로 확인하도록 넣고, 등록이 모두 해제된 캐릭터는 뺍니다.
+        now = time.monotonic()
+        for character_name in character_names:
+            if character_name not in self.due_times:
+                self.schedule(character_name, now)
+        for character_name in [name for name in self.due_times if name not in character_names]:
+            self.remove(character_name)
+
+    def pop_due(self, budget):
+        now = time.monotonic()
+        due = []
+        while self.heap and len(due) < budget and self.heap[0][0] <= now:
+            when, _, character_name = heapq.heappop(self.heap)
+            if self.due_times.get(character_name) != when:
+                continue  # 다시 예약되었거나 제거된 항목
+            self.due_times[character_name] = None
+            due.append(character_name)
+        return due
+
+    def record(self, character_name, info):
+        if character_name not in self.due_times:
+            return  # 확인하는 동안 등록이 해제됨
+        interval = self.intervals.get(character_name, self.min_interval)
+        if info[0] is not None and info != self.last_info.get(character_name):
+            interval = self.min_interval
+            self.last_info[character_name] = info
+        else:
+            interval = min(interval * self.backoff, self.max_interval)
+        self.intervals[character_name] = interval
+        self.schedule(character_name, time.monotonic() + interval)
+
+refresh_scheduler = RefreshScheduler()
+
+# 캐릭터 이름 -> 그 캐릭터를 등록한 (user_id, guild_id) 목록
+def registrations_by_character():
+    registrations = {}
+    for key, data in user_character_data.items():
+        registrations.setdefault(data["character_name"], []).append(key)
+    return registrations
+
 # 버튼 뷰 클래스
 class NicknameView(View):
     def __init__(self, ctx):
@@ -100,14 +321,17 @@ class NicknameView(View):
             user_character_data[(self.ctx.author.id, self.ctx.guild.id)] = {
                 "character_name": character_name
             }
-            save_user_data()  # 데이터를 저장합니다.
-            loaclass, loalevel = await fetch_lostark_info(character_name)
+            save_user_data((self.ctx.author.id, self.ctx.guild.id))  # 데이터를 저장합니다.
+            refresh_scheduler.bump(character_name)  # 다음 갱신 때 가장 먼저 확인합니다.
+            loaclass, loalevel = await get_lostark_info(character_name)
 
             if loaclass is None or loalevel is None:
                 await self.ctx.send("캐릭터 정보를 가져오지 못했어요. 다시 시도해주세요...", ephemeral=True)
                 return
 
-            await self.ctx.author.edit(nick=f'{character_name}/{loaclass}/{loalevel}')
+            new_nick = f'{character_name}/{loaclass}/{loalevel}'
+            await self.ctx.author.edit(nick=new_nick)
+            remember_fingerprint((self.ctx.author.id, self.ctx.guild.id), character_name, [loaclass, loalevel, new_nick])
             await self.ctx.send(f"{self.ctx.author.mention}, 닉네임이 {character_name}/{loaclass}/{loalevel}로 변경됐어요...", ephemeral=True)
         except asyncio.TimeoutError:
             await self.ctx.send("시간이 초과됐어요...", ephemeral=True)
@@ -127,7 +351,9 @@ class NicknameView(View):
 
         if (self.ctx.author.id, self.ctx.guild.id) in user_character_data:
             del user_character_data[(self.ctx.author.id, self.ctx.guild.id)]
-            save_user_data()  # 데이터를 저장합니다.
+            save_user_data((self.ctx.author.id, self.ctx.guild.id))  # 데이터를 저장합니다.
+            # 대기열에 남은 닉네임 변경이 기본 닉네임을 다시 덮어쓰지 않도록 지웁니다.
+            nickname_edit_queue.pending.pop((self.ctx.author.id, self.ctx.guild.id), None)
             try:
                 await self.ctx.author.edit(nick=self.ctx.author.name)  # 기본 닉네임으로 변경
                 await self.ctx.send(f"{self.ctx.author.mention}, 닉네임 등록이 해제됐어요...", ephemeral=True)
@@ -149,86 +375,159 @@ async def loanickchange(ctx):
     view = NicknameView(ctx)
     await ctx.send("닉네임을 등록하거나 등록을 해제할 수 있습니다.", view=view, ephemeral=True)
 
+# 마지막으로 적용한 (클래스, 레벨, 닉네임)을 등록 정보에 함께 저장합니다.
+def remember_fingerprint(key, character_name, fingerprint):
+    data = user_character_data.get(key)
+    if data is None or data["character_name"] != character_name:
+        return  # 변경하는 동안 등록이 해제되었거나 다른 캐릭터로 바뀜
+    data["fingerprint"] = fingerprint
+    save_user_data(key)
+
+# 닉네임 변경 요청을 한 줄로 세워 일정 간격으로 보내는 대기열
+# 같은 멤버의 변경이 여러 번 쌓이면 마지막 것만 보내고, 429를 받으면 기다렸다가 다시 시도합니다.
+class NicknameEditQueue:
+    def __init__(self, interval=NICKNAME_EDIT_INTERVAL, retries=NICKNAME_EDIT_RETRIES):
+        self.interval = interval
+        self.retries = retries
+        self.queue = asyncio.Queue()
+        self.pending = {}  # (user_id, guild_id) -> (멤버, 캐릭터 이름, 지문, 시도 횟수)
+        self.worker = None
+
+    def put(self, key, member, character_name, fingerprint, attempt=0):
+        if key not in self.pending:
+            self.queue.put_nowait(key)
+        self.pending[key] = (member, character_name, fingerprint, attempt)
+        if self.worker is None or self.worker.done():
+            self.worker = asyncio.create_task(self.run())
+
+    async def run(self):
+        while not self.queue.empty():
+            key = self.queue.get_nowait()
+            item = self.pending.pop(key, None)
+            if item is None:
+                continue
+            member, character_name, fingerprint, attempt = item
+            data = user_character_data.get(key)
+            if data is None or data["character_name"] != character_name:
+                # 기다리는 동안 등록이 해제되었거나 다른 캐릭터로 바뀌었으면 예전 닉네임을 덮어쓰지 않습니다.
+                logging.info(f"Dropped stale nickname update for {member.name}")
+                continue
+            new_nick = fingerprint[2]
+            delay = self.interval
+            try:
+                await member.edit(nick=new_nick)
+                logging.info(f"Nickname updated for {member.name} to '{new_nick}'")
+                remember_fingerprint(key, character_name, fingerprint)
+            except discord.Forbidden:
+                logging.error(f"Failed to update nickname for {member.name}: insufficient permissions.")
+                # 권한 문제는 다시 시도해도 같으므로, 정보가 바뀔 때까지 다시 시도하지 않습니다.
+                remember_fingerprint(key, character_name, fingerprint)
+            except discord.HTTPException as e:
+                if e.status == 429 and attempt < self.retries:
+                    retry_after = e.response.headers.get('Retry-After') if e.response is not None else None
+                    delay = max(delay, float(retry_after or self.interval * 2 ** (attempt + 1)))
+                    logging.warning(f"Rate limited while updating nickname for {member.name}. Retrying in {delay:.1f}s")
+                    if key not in self.pending:
+                        self.put(key, member, character_name, fingerprint, attempt + 1)
+                else:
+                    logging.error(f"Error updating nickname for {member.name}: {e}")
+            except Exception as e:
+                logging.error(f"Error updating nickname for {member.name}: {e}")
+            await asyncio.sleep(delay)
+
+nickname_edit_queue = NicknameEditQueue()
+
 # 닉네임 갱신 작업
-@tasks.loop(minutes=1)
+# 매번 모든 등록을 훑지 않고, 스케줄러가 정한 확인 시각이 된 캐릭터만 예산 안에서 확인합니다.
+@tasks.loop(seconds=REFRESH_TICK_INTERVAL)
 async def update_nicknames():
-    logging.info("Starting nickname update task.")
     await bot.wait_until_ready()
 
-    # 디버깅을 위해 user_character_data의 내용을 출력
-    logging.info(f"user_character_data: {user_character_data}")
+    registrations = registrations_by_character()
+    refresh_scheduler.sync(registrations)
+    due = refresh_scheduler.pop_due(REFRESH_TICK_BUDGET)
+    if not due:
+        return
+    logging.info(f"Starting nickname update task for {len(due)} characters.")
+
+    # 확인할 캐릭터 정보를 동시에 가져옵니다. (동시 요청 수는 fetcher가 제한)
+    # 방금 수동 등록으로 가져온 정보처럼 충분히 최근 값은 다시 요청하지 않습니다.
+    infos = await asyncio.gather(*(get_lostark_info(name, max_age=REFRESH_MIN_INTERVAL / 2) for name in due))
+
+    # 서버별로 묶어서 서버마다 한 번에 멤버를 찾습니다.
+    updates_by_guild = {}
+    for character_name, (loaclass, loalevel) in zip(due, infos):
+        refresh_scheduler.record(character_name, (loaclass, loalevel))
+        if not loaclass or not loalevel:
+            logging.error(f"Failed to fetch info for character {character_name}. Skipping...")
+            continue
 
-    for (user_id, guild_id), data in user_character_data.items():
-        character_name = data["character_name"]
-        logging.info(f"Processing user_id: {user_id}, character_name: {character_name}, guild_id: {guild_id}")
+        for user_id, guild_id in registrations.get(character_name, []):
+            updates_by_guild.setdefault(guild_id, []).append((user_id, character_name, loaclass, loalevel))
 
+    for guild_id, updates in updates_by_guild.items():
         guild = bot.get_guild(guild_id)
         if not guild:
             logging.warning(f"Guild with ID {guild_id} not found")
             continue
 
+        members = await resolve_members(guild, [user_id for user_id, *_ in updates])
+        for user_id, character_name, loaclass, loalevel in updates:
+            logging.info(f"Processing user_id: {user_id}, character_name: {character_name}, guild_id: {guild_id}")
+            member = members.get(user_id)
+            if member is None:
+                logging.warning(f"Member with ID {user_id} not found in guild {guild.name}")
+                continue
+            update_member_nickname((user_id, guild_id), member, character_name, loaclass, loalevel)
+
+# 멤버를 캐시에서 먼저 찾고, 없는 멤버만 게이트웨이 멤버 요청으로 한꺼번에 가져옵니다.
+# 게이트웨이 요청이 실패하면 그때만 REST(fetch_member)로 한 명씩 가져옵니다.
+async def resolve_members(guild, user_ids):
+    members = {}
+    missing = []
+    for user_id in user_ids:
+        member = guild.get_member(user_id)
+        if member is None:
+            missing.append(user_id)
+        else:
+            members[user_id] = member
+
+    for start in range(0, len(missing), MEMBER_QUERY_BATCH):
+        batch = missing[start:start + MEMBER_QUERY_BATCH]
         try:
-            # fetch_member를 사용하여 멤버를 정확하게 찾습니다.
-            member = await guild.fetch_member(user_id)
-        except discord.NotFound:
-            logging.warning(f"Member with ID {user_id} not found in guild {guild.name}")
-            continue
-        except discord.Forbidden:
-            logging.warning(f"Insufficient permissions to fetch member {user_id} in guild {guild.name}")
-            continue
+            # cache=True이므로 찾은 멤버는 캐시에 남아 다음부터는 get_member로 바로 찾습니다.
+            found = await guild.query_members(user_ids=batch, limit=len(batch), cache=True)
         except Exception as e:
-            logging.error(f"Error fetching member {user_id} in guild {guild.name}: {e}")
-            continue
-
-        current_nick = member.display_name
-        logging.info(f"Checking nickname for {member.name}: current nickname is '{current_nick}'")
-
-        # 최신 캐릭터 정보 가져오기
-        loaclass, loalevel = await fetch_lostark_info(character_name)
-        if not loaclass or not loalevel:
-            logging.error(f"Failed to fetch info for character {character_name}. Skipping...")
-            continue
-
-        logging.info(f"Current character info: Class = {loaclass}, Level = {loalevel}")
-
-        # 현재 닉네임에서 클래스와 레벨 추출 (캐릭터이름/클래스/레벨 형식)
-        parts = current_nick.split('/')
-        if len(parts) == 3 and parts[0] == character_name:
-            current_class, current_level = parts[1], parts[2]
-            logging.info(f"Comparing current class = {current_class}, current level = {current_level} with fetched class = {loaclass}, fetched level = {loalevel}")
-
-            try:
-                # 레벨을 숫자로 변환하여 비교
-                current_level_num = float(current_level)
-                fetched_level_num = float(loalevel)
-            except ValueError:
-                logging.error(f"Failed to convert levels to numbers for comparison: current_level = {current_level}, fetched_level = {loalevel}")
-                continue  # 비교를 진행할 수 없으므로, 다음 루프를 진행합니다.
-
-            # 클래스나 레벨이 다른 경우 닉네임 갱신
-            if current_class != loaclass or current_level_num != fetched_level_num:
-                new_nick = f'{character_name}/{loaclass}/{loalevel}'
-                logging.info(f"Updating nickname for {member.name} to '{new_nick}'")
+            logging.warning(f"Member chunk request failed in guild {guild.name}: {e}. Falling back to fetch_member.")
+            found = []
+            for user_id in batch:
                 try:
-                    await member.edit(nick=new_nick)
-                    logging.info(f"Nickname updated for {member.name} to '{new_nick}'")
+                    found.append(await guild.fetch_member(user_id))
+                except discord.NotFound:
+                    pass
                 except discord.Forbidden:
-                    logging.error(f"Failed to update nickname for {member.name}: insufficient permissions.")
+                    logging.warning(f"Insufficient permissions to fetch member {user_id} in guild {guild.name}")
                 except Exception as e:
-                    logging.error(f"Error updating nickname for {member.name}: {e}")
-            else:
-                logging.info(f"No change needed for {member.name}. Current class and level are up-to-date.")
-        else:
-            # 현재 닉네임이 예상 형식이 아닌 경우 닉네임 갱신
-            new_nick = f'{character_name}/{loaclass}/{loalevel}'
-            logging.info(f"Updating nickname for {member.name} to '{new_nick}'")
-            try:
-                await member.edit(nick=new_nick)
-                logging.info(f"Nickname updated for {member.name} to '{new_nick}'")
-            except discord.Forbidden:
-                logging.error(f"Failed to update nickname for {member.name}: insufficient permissions.")
-            except Exception as e:
-                logging.error(f"Error updating nickname for {member.name}: {e}")
+                    logging.error(f"Error fetching member {user_id} in guild {guild.name}: {e}")
+        members.update({member.id: member for member in found})
+    return members
+
+# 등록된 멤버 한 명의 닉네임을 최신 캐릭터 정보에 맞춥니다.
+# 현재 닉네임을 다시 파싱하지 않고, 마지막으로 적용한 지문과 다를 때만 변경을 대기열에 넣습니다.
+# 사용자가 닉네임을 직접 바꿔도 캐릭터 정보가 바뀌기 전까지는 덮어쓰지 않습니다.
+def update_member_nickname(key, member, character_name, loaclass, loalevel):
+    data = user_character_data.get(key)
+    if data is None:
+        return
+
+    new_nick = f'{character_name}/{loaclass}/{loalevel}'
+    fingerprint = [loaclass, loalevel, new_nick]
+    if data.get("fingerprint") == fingerprint:
+        logging.info(f"No change needed for {member.name}. Current class and level are up-to-date.")
+        return
+
+    logging.info(f"Updating nickname for {member.name} to '{new_nick}'")
+    nickname_edit_queue.put(key, member, character_name, fingerprint)
 
 # 비동기 작업을 시작하는 함수
 def start_tasks():
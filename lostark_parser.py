@@ -0,0 +1,124 @@
+# lostark_parser.py
+# 로스트아크 캐릭터 프로필 페이지에서 클래스와 원정대 레벨만 뽑아내는 모듈입니다.
+#
+# 추출 방식(backend)을 바꿔 끼울 수 있습니다.
+#   htmlparser : 표준 라이브러리 HTMLParser로 페이지를 조금씩 읽다가 두 값을 찾는 즉시 멈춥니다. (기본값)
+#   bs4        : 페이지 전체를 BeautifulSoup으로 파싱해 CSS 선택자로 찾습니다. (검증 및 대체용)
+import logging
+import os
+from html.parser import HTMLParser
+
+from bs4 import BeautifulSoup
+
+CLASS_SELECTOR = '#lostark-wrapper > div > main > div > div.profile-character-info > img'
+LEVEL_SELECTOR = '#lostark-wrapper > div > main > div > div.profile-ingame > div.profile-info > div.level-info2 > div.level-info2__expedition > span:nth-child(2)'
+
+CLASS_CONTAINER = 'profile-character-info'  # 클래스 이미지(img alt)를 감싼 div의 클래스
+LEVEL_CONTAINER = 'level-info2__expedition'  # 원정대 레벨 span을 감싼 div의 클래스
+
+FEED_CHUNK_SIZE = 16 * 1024  # htmlparser 방식이 한 번에 읽는 글자 수
+
+# 닫는 태그가 없는 요소
+VOID_ELEMENTS = frozenset({
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'param', 'source', 'track', 'wbr',
+})
+
+
+def clean_level(text):
+    return text.replace("Lv.", "").replace(",", "").strip()  # 쉼표 제거 및 공백 제거
+
+
+class _Found(Exception):
+    pass
+
+
+class ProfileParser(HTMLParser):
+    """프로필 페이지를 앞에서부터 읽으며 클래스와 원정대 레벨을 찾는 파서입니다."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.stack = []  # 열린 요소들: [태그, 클래스 집합, 지금까지 나온 자식 요소 수]
+        self.loaclass = None
+        self.loalevel = None
+        self.level_parts = None  # 레벨 span 안의 텍스트를 모으는 중이면 리스트
+        self.level_depth = 0
+
+    @property
+    def done(self):
+        return self.loaclass is not None and self.loalevel is not None
+
+    def handle_starttag(self, tag, attrs):
+        parent = self.stack[-1] if self.stack else None
+        if parent is not None:
+            parent[2] += 1
+
+        if parent is not None and parent[0] == 'div':
+            if tag == 'img' and self.loaclass is None and CLASS_CONTAINER in parent[1]:
+                self.loaclass = dict(attrs).get('alt') or 'Unknown Class'
+            elif tag == 'span' and self.loalevel is None and parent[2] == 2 and LEVEL_CONTAINER in parent[1]:
+                # span:nth-child(2) — 부모의 두 번째 자식 요소일 때만 레벨로 봅니다.
+                self.level_parts = []
+                self.level_depth = len(self.stack) + 1
+
+        if tag not in VOID_ELEMENTS:
+            classes = frozenset((dict(attrs).get('class') or '').split())
+            self.stack.append([tag, classes, 0])
+
+        if self.done:
+            raise _Found
+
+    def handle_endtag(self, tag):
+        for index in range(len(self.stack) - 1, -1, -1):
+            if self.stack[index][0] == tag:
+                del self.stack[index:]
+                break
+
+        if self.level_parts is not None and len(self.stack) < self.level_depth:
+            self.loalevel = clean_level(''.join(self.level_parts))
+            self.level_parts = None
+            if self.done:
+                raise _Found
+
+    def handle_data(self, data):
+        if self.level_parts is not None:
+            self.level_parts.append(data)
+
+
+def extract_with_htmlparser(html):
+    parser = ProfileParser()
+    try:
+        for start in range(0, len(html), FEED_CHUNK_SIZE):
+            parser.feed(html[start:start + FEED_CHUNK_SIZE])
+        parser.close()
+    except _Found:
+        pass
+    if not parser.done:
+        return None, None
+    return parser.loaclass, parser.loalevel
+
+
+def extract_with_bs4(html):
+    # 'html.parser'를 사용하여 HTML을 파싱합니다.
+    soup = BeautifulSoup(html, 'html.parser')
+    loaclass_element = soup.select_one(CLASS_SELECTOR)
+    loalevel_element = soup.select_one(LEVEL_SELECTOR)
+    if loaclass_element is None or loalevel_element is None:
+        return None, None
+    return loaclass_element.get('alt', 'Unknown Class'), clean_level(loalevel_element.text)
+
+
+EXTRACTORS = {
+    'htmlparser': extract_with_htmlparser,
+    'bs4': extract_with_bs4,
+}
+DEFAULT_EXTRACTOR = os.getenv('LOSTARK_EXTRACTOR', 'htmlparser')
+
+
+def extract_profile(html, backend=DEFAULT_EXTRACTOR):
+    """(클래스, 레벨)을 반환합니다. 기본 방식으로 찾지 못하면 BeautifulSoup으로 한 번 더 확인합니다."""
+    loaclass, loalevel = EXTRACTORS[backend](html)
+    if (loaclass is None or loalevel is None) and backend != 'bs4':
+        loaclass, loalevel = extract_with_bs4(html)
+        if loaclass is not None and loalevel is not None:
+            logging.warning(f"{backend} 추출기가 찾지 못한 값을 bs4 추출기가 찾았어요. 추출기를 확인해주세요.")
+    return loaclass, loalevel
@@ -1,30 +1,16 @@
 # main.py
 import os
-import discord
-from discord.ext import commands
 import asyncio
 import threading
 from http.server import SimpleHTTPRequestHandler, HTTPServer
 
-# 다른 모듈에서 기능을 가져옵니다.
-import chat_management
-import lostark_features
-import voice_management
-import command_help
-import word_chain
-import change_botname  # 새로 추가된 모듈
+# TTS 작업 프로세스는 spawn으로 뜨면서 이 파일을 __mp_main__으로 다시 불러옵니다.
+# 작업 프로세스마다 디스코드 라이브러리와 모든 기능 모듈을 불러오지 않도록,
+# 무거운 모듈을 불러오고 봇을 만드는 일은 직접 실행했을 때 main() 안에서만 합니다.
 
 # 봇의 토큰을 환경 변수에서 가져옵니다.
 TOKEN = os.getenv('DISCORD_TOKEN')
 
-# 디스코드 봇 인텐트를 설정합니다.
-intents = discord.Intents.default()
-intents.message_content = True
-intents.voice_states = True
-
-# 디스코드 봇 인스턴스를 생성하고 기본 help 명령어를 비활성화합니다.
-bot = commands.Bot(command_prefix='!', intents=intents, help_command=None)
-
 # 더미 HTTP 서버를 실행하기 위한 함수
 def run_dummy_server():
     server_address = ('', int(os.getenv('PORT', 8000)))  # 포트 8000을 기본으로 사용하고, 환경변수 'PORT' 값을 사용할 수 있음
@@ -32,17 +18,42 @@ def run_dummy_server():
     print(f"Starting dummy server on port {server_address[1]}")
     httpd.serve_forever()
 
-# 봇의 이벤트 핸들러: 봇이 준비되었을 때 호출됩니다.
-@bot.event
-async def on_ready():
-    print(f'Logged in as {bot.user}!')
-    # 필요한 경우 Lost Ark 닉네임 업데이트 작업 시작
-    if not lostark_features.update_nicknames.is_running():
-        print("Starting the Lost Ark nickname update task")
-        lostark_features.update_nicknames.start()
+# 디스코드 봇 인스턴스를 생성하고 기본 help 명령어를 비활성화합니다.
+def create_bot():
+    import discord
+    from discord.ext import commands
+    import lostark_features
+
+    # 디스코드 봇 인텐트를 설정합니다.
+    intents = discord.Intents.default()
+    intents.message_content = True
+    intents.voice_states = True
+
+    bot = commands.Bot(command_prefix='!', intents=intents, help_command=None)
+
+    # 봇의 이벤트 핸들러: 봇이 준비되었을 때 호출됩니다.
+    @bot.event
+    async def on_ready():
+        print(f'Logged in as {bot.user}!')
+        # 필요한 경우 Lost Ark 닉네임 업데이트 작업 시작
+        if not lostark_features.update_nicknames.is_running():
+            print("Starting the Lost Ark nickname update task")
+            lostark_features.update_nicknames.start()
+
+    return bot
 
 # 비동기 작업을 별도로 실행하기 위한 함수
 async def main():
+    # 다른 모듈에서 기능을 가져옵니다.
+    import chat_management
+    import lostark_features
+    import voice_management
+    import command_help
+    import word_chain
+    import change_botname  # 새로 추가된 모듈
+
+    bot = create_bot()
+
     # 더미 서버를 백그라운드에서 실행합니다.
     server_thread = threading.Thread(target=run_dummy_server)
     server_thread.daemon = True
@@ -58,8 +69,12 @@ async def main():
 
     # 봇을 시작합니다.
     async with bot:
-        await bot.start(TOKEN)
+        try:
+            await bot.start(TOKEN)
+        finally:
+            # 로스트아크 기능이 쓰던 HTTP 세션과 저장소를 정리합니다.
+            await lostark_features.shutdown()
 
 # asyncio를 사용하여 이벤트 루프를 시작합니다.
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
@@ -0,0 +1,142 @@
+# tts_cache.py
+# 합성한 TTS 음성을 (정규화한 텍스트, 언어)로 찾아 다시 쓰는 캐시 모듈입니다.
+#
+# 메모리에는 최근에 쓴 음성을 바이트 크기 상한까지 LRU로 보관합니다.
+# TTS_CACHE_DIR을 지정하면 음성을 <해시>.mp3 파일로도 저장해 재시작 후에도 다시 쓸 수 있습니다.
+# 메서드는 작업 스레드와 이벤트 루프에서 함께 부를 수 있도록 잠금으로 보호합니다.
+import hashlib
+import logging
+import os
+import threading
+import unicodedata
+from collections import OrderedDict
+
+CACHE_MAX_BYTES = int(os.getenv('TTS_CACHE_MAX_BYTES', 32 * 1024 * 1024))  # 메모리 캐시 최대 크기
+CACHE_DIR = os.getenv('TTS_CACHE_DIR')  # 지정하지 않으면 디스크에 저장하지 않습니다.
+CACHE_DISK_MAX_BYTES = int(os.getenv('TTS_CACHE_DISK_MAX_BYTES', 256 * 1024 * 1024))  # 디스크 캐시 최대 크기
+
+
+def normalize_text(text):
+    # 유니코드 정규화 후 앞뒤 공백을 지우고 연속된 공백을 하나로 줄입니다.
+    return ' '.join(unicodedata.normalize('NFC', text).split())
+
+
+def cache_key(text, lang):
+    return hashlib.sha256(f"{lang}\0{normalize_text(text)}".encode('utf-8')).hexdigest()
+
+
+class TTSCache:
+    def __init__(self, max_bytes=CACHE_MAX_BYTES, directory=CACHE_DIR, disk_max_bytes=CACHE_DISK_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.disk_max_bytes = disk_max_bytes
+        self.entries = OrderedDict()  # 키 -> 음성 바이트 (가장 최근에 쓴 것이 뒤쪽)
+        self.size = 0
+        self.disk_entries = OrderedDict()  # 키 -> 파일 크기 (가장 최근에 쓴 것이 뒤쪽)
+        self.disk_size = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if directory:
+            self.load_index()
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.mp3")
+
+    def load_index(self):
+        # 파일 수정 시각을 마지막 사용 시각으로 보고 오래된 것부터 줄을 세웁니다.
+        os.makedirs(self.directory, exist_ok=True)
+        files = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.mp3'):
+                continue
+            stat = os.stat(os.path.join(self.directory, name))
+            files.append((stat.st_mtime, name[:-4], stat.st_size))
+        for _, key, size in sorted(files):
+            self.disk_entries[key] = size
+            self.disk_size += size
+        self.evict_disk()
+        logging.info(f"TTS cache index loaded from {self.directory} ({len(self.disk_entries)} clips, {self.disk_size} bytes)")
+
+    def get(self, key, disk=True):
+        """캐시된 음성을 반환합니다. disk=False면 메모리만 확인하므로 이벤트 루프에서 불러도 됩니다."""
+        with self.lock:
+            audio = self.entries.get(key)
+            if audio is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return audio
+            if not disk or key not in self.disk_entries:
+                if disk:
+                    self.misses += 1
+                return None
+            self.disk_entries.move_to_end(key)
+
+        try:
+            with open(self.path(key), 'rb') as file:
+                audio = file.read()
+            os.utime(self.path(key))
+        except OSError as e:
+            logging.warning(f"Error reading TTS cache file for {key}: {e}")
+            with self.lock:
+                self.disk_size -= self.disk_entries.pop(key, 0)
+                self.misses += 1
+            return None
+
+        with self.lock:
+            self.hits += 1
+            self.store(key, audio)
+        return audio
+
+    def put(self, key, audio):
+        with self.lock:
+            self.store(key, audio)
+            if not self.directory or key in self.disk_entries:
+                return
+        # 임시 파일에 쓴 뒤 교체하므로, 쓰는 도중에 죽어도 깨진 음성 파일이 남지 않습니다.
+        tmp = f"{self.path(key)}.tmp"
+        try:
+            with open(tmp, 'wb') as file:
+                file.write(audio)
+            os.replace(tmp, self.path(key))
+        except OSError as e:
+            logging.warning(f"Error writing TTS cache file for {key}: {e}")
+            return
+        with self.lock:
+            if key not in self.disk_entries:
+                self.disk_entries[key] = len(audio)
+                self.disk_size += len(audio)
+            self.evict_disk()
+
+    def store(self, key, audio):
+        # 잠금을 잡은 상태에서 부릅니다. 상한보다 큰 음성은 메모리에 두지 않습니다.
+        if len(audio) > self.max_bytes:
+            return
+        previous = self.entries.pop(key, None)
+        if previous is not None:
+            self.size -= len(previous)
+        self.entries[key] = audio
+        self.size += len(audio)
+        while self.size > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= len(evicted)
+
+    def evict_disk(self):
+        while self.disk_size > self.disk_max_bytes and self.disk_entries:
+            key, size = self.disk_entries.popitem(last=False)
+            self.disk_size -= size
+            try:
+                os.remove(self.path(key))
+            except OSError as e:
+                logging.warning(f"Error removing TTS cache file for {key}: {e}")
+
+    def stats(self):
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'clips': len(self.entries),
+                'bytes': self.size,
+                'disk_clips': len(self.disk_entries),
+                'disk_bytes': self.disk_size,
+            }
@@ -0,0 +1,330 @@
+# tts_decoder.py
+# 서버마다 ffmpeg 프로세스 하나를 계속 띄워 두고 TTS 음성을 차례로 디코딩하는 모듈입니다.
+#
+# 음성마다 FFmpegPCMAudio를 만들면 매번 ffmpeg 프로세스를 새로 띄우고 코덱을 초기화해야 해서,
+# 짧은 문장에서는 그 비용이 재생 시간보다 커집니다. 여기서는 mp3 프레임을 직접 파싱해
+# ID3 태그와 Xing/Info 프레임을 걷어낸 뒤 하나의 연속된 mp3 스트림으로 ffmpeg에 넣고,
+# 프레임 수로 각 음성이 PCM 출력의 어디서 끝나는지 계산해 음성 단위로 잘라 재생합니다.
+#
+# 지원하는 입력은 gTTS가 만드는 MPEG Layer III입니다. 다른 형식의 프레임은 건너뛰므로,
+# 다른 형식을 재생해야 하면 TTS_PERSISTENT_DECODER=0으로 음성마다 FFmpegPCMAudio를 쓰면 됩니다.
+import logging
+import subprocess
+import threading
+import time
+
+import discord
+
+OUTPUT_SAMPLE_RATE = discord.opus.Encoder.SAMPLING_RATE  # 48000
+OUTPUT_CHANNELS = discord.opus.Encoder.CHANNELS  # 2
+OUTPUT_SAMPLE_BYTES = discord.opus.Encoder.SAMPLE_SIZE  # 채널 합계 4바이트 (s16le 스테레오)
+OUTPUT_FRAME_BYTES = discord.opus.Encoder.FRAME_SIZE  # 20ms 분량 (3840바이트)
+
+# 음성 끝에 붙이는 무음의 최소 크기. ffmpeg의 mp3 디먹서는 입력을 1024바이트 단위로 읽고 디코더도
+# 프레임 몇 개를 붙잡고 있으므로, 그보다 넉넉히 넣어야 음성의 마지막 샘플까지 출력됩니다.
+PAD_BYTES = 2048
+PAD_MIN_FRAMES = 4
+READ_TIMEOUT = 5.0  # 입력이 끝난 뒤에도 디코더 출력을 이보다 오래 기다리면 그 음성의 재생을 끝냅니다. (초)
+STALL_WAIT = 0.02  # 출력이 아직 없을 때 무음으로 채우기 전에 기다리는 시간 (초)
+
+BITRATES = {
+    1: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],  # MPEG-1 Layer III
+    2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],  # MPEG-2/2.5 Layer III
+}
+SAMPLE_RATES = {
+    3: [44100, 48000, 32000],  # MPEG-1
+    2: [22050, 24000, 16000],  # MPEG-2
+    0: [11025, 12000, 8000],  # MPEG-2.5
+}
+
+
+class FrameHeader:
+    __slots__ = ('version', 'sample_rate', 'channels', 'samples', 'length', 'side_info', 'crc')
+
+    def __init__(self, data, pos):
+        b1, b2, b3 = data[pos + 1], data[pos + 2], data[pos + 3]
+        if data[pos] != 0xFF or b1 & 0xE0 != 0xE0:
+            raise ValueError("no frame sync")
+        self.version = (b1 >> 3) & 3
+        if self.version == 1 or (b1 >> 1) & 3 != 1:
+            raise ValueError("not MPEG Layer III")
+        bitrate_index = b2 >> 4
+        sample_rate_index = (b2 >> 2) & 3
+        if bitrate_index in (0, 15) or sample_rate_index == 3:
+            raise ValueError("bad bitrate or sample rate")
+
+        mpeg1 = self.version == 3
+        bitrate = BITRATES[1 if mpeg1 else 2][bitrate_index] * 1000
+        self.sample_rate = SAMPLE_RATES[self.version][sample_rate_index]
+        self.channels = 1 if b3 >> 6 == 3 else 2
+        self.samples = 1152 if mpeg1 else 576
+        self.length = (144 if mpeg1 else 72) * bitrate // self.sample_rate + ((b2 >> 1) & 1)
+        if mpeg1:
+            self.side_info = 17 if self.channels == 1 else 32
+        else:
+            self.side_info = 9 if self.channels == 1 else 17
+        self.crc = not b1 & 1
+
+    def is_info_frame(self, data, pos):
+        # 인코더가 앞에 붙이는 Xing/Info/VBRI 프레임은 소리가 없는 메타데이터입니다.
+        offset = pos + 4 + (2 if self.crc else 0) + self.side_info
+        return data[offset:offset + 4] in (b'Xing', b'Info') or data[pos + 36:pos + 40] == b'VBRI'
+
+
+def silent_frame(data, pos, header):
+    # 같은 형식의 프레임 헤더에 사이드 정보와 본문을 모두 0으로 채우면 무음으로 디코딩됩니다.
+    b1 = data[pos + 1] | 1  # CRC 없음
+    b2 = data[pos + 2] & ~0x02  # 패딩 없음
+    length = header.length - ((data[pos + 2] >> 1) & 1)
+    return bytes((0xFF, b1, b2, data[pos + 3])) + bytes(length - 4)
+
+
+class FrameReader:
+    """조각 단위로 들어오는 mp3 바이트에서 소리가 있는 프레임만 골라냅니다."""
+
+    def __init__(self):
+        self.pending = bytearray()
+        self.skip = 0  # 다음 데이터에서 건너뛸 태그 바이트 수
+        self.format = None  # (샘플레이트, 채널 수)
+        self.samples = 0
+        self.silence = None  # 이 스트림 형식의 무음 프레임
+
+    def feed(self, data):
+        """완성된 프레임들의 바이트를 반환합니다. 잘린 마지막 프레임은 다음 데이터가 올 때까지 보관합니다."""
+        self.pending += data
+        buffer = self.pending
+        frames = bytearray()
+        pos = 0
+        while True:
+            if self.skip:
+                skipped = min(self.skip, len(buffer) - pos)
+                pos += skipped
+                self.skip -= skipped
+                if self.skip:
+                    break
+            if len(buffer) - pos < 10:
+                break
+            if buffer[pos:pos + 3] == b'ID3':
+                # ID3v2 태그: 크기는 7비트씩 나눠 적힌 4바이트 값이고, 푸터 플래그가 있으면 10바이트가 더 붙습니다.
+                size = (buffer[pos + 6] << 21) | (buffer[pos + 7] << 14) | (buffer[pos + 8] << 7) | buffer[pos + 9]
+                self.skip = 10 + size + (10 if buffer[pos + 5] & 0x10 else 0)
+                continue
+            if buffer[pos:pos + 3] == b'TAG':
+                self.skip = 128  # ID3v1 태그
+                continue
+            try:
+                header = FrameHeader(buffer, pos)
+            except ValueError:
+                pos += 1  # 다음 동기 바이트를 찾습니다.
+                continue
+            if len(buffer) - pos < header.length:
+                break
+            if not header.is_info_frame(buffer, pos):
+                if self.format is None:
+                    self.format = (header.sample_rate, header.channels)
+                    self.silence = silent_frame(buffer, pos, header)
+                if (header.sample_rate, header.channels) == self.format:
+                    frames += buffer[pos:pos + header.length]
+                    self.samples += header.samples
+            pos += header.length
+        del buffer[:pos]
+        return bytes(frames)
+
+    @property
+    def samples_per_frame(self):
+        return 1152 if self.format and self.format[0] >= 32000 else 576
+
+
+class PersistentDecoder:
+    """서버 하나가 계속 쓰는 ffmpeg 프로세스입니다. mp3를 stdin으로 넣고 48kHz 스테레오 PCM을 stdout에서 읽습니다."""
+
+    def __init__(self, executable='ffmpeg'):
+        self.executable = executable
+        self.process = None
+        self.format = None  # 지금 프로세스가 디코딩하는 (샘플레이트, 채널 수)
+        self.condition = threading.Condition()
+        self.buffer = bytearray()  # 아직 읽지 않은 PCM 출력
+        self.buffer_offset = 0  # buffer[0]이 출력 전체에서 몇 번째 바이트인지
+        self.input_samples = 0  # 지금까지 넣은 입력 샘플 수
+        self.input_lock = threading.Lock()  # 한 번에 한 음성만 입력합니다.
+        self.closed = False
+        self.spawned = 0
+
+    def input_offset(self, samples):
+        # 입력 샘플 위치에 해당하는 출력 바이트 위치 (리샘플링 비율로 환산)
+        return round(samples * OUTPUT_SAMPLE_RATE / self.format[0]) * OUTPUT_SAMPLE_BYTES
+
+    def start(self, audio_format):
+        self.stop()
+        args = [
+            self.executable, '-hide_banner', '-loglevel', 'warning',
+            '-fflags', 'nobuffer', '-probesize', '32', '-analyzeduration', '0',
+            '-f', 'mp3', '-i', 'pipe:0',
+            '-f', 's16le', '-ar', str(OUTPUT_SAMPLE_RATE), '-ac', str(OUTPUT_CHANNELS),
+            '-flush_packets', '1', 'pipe:1',
+        ]
+        try:
+            self.process = subprocess.Popen(args, stdin=subprocess.PIPE, stdout=subprocess.PIPE, bufsize=0)
+        except FileNotFoundError:
+            raise discord.ClientException(f"{self.executable} was not found.") from None
+        self.spawned += 1
+        self.format = audio_format
+        with self.condition:
+            self.buffer.clear()
+            self.buffer_offset = 0
+            self.input_samples = 0
+        threading.Thread(target=self.read_output, args=(self.process,), daemon=True, name='tts-decoder-reader').start()
+        logging.info(f"Started persistent TTS decoder ({audio_format[0]} Hz, {audio_format[1]} ch)")
+
+    def read_output(self, process):
+        # 출력은 계속 읽어 둬야 ffmpeg가 stdout에 막혀 입력을 멈추지 않습니다.
+        while True:
+            data = process.stdout.read(65536)
+            with self.condition:
+                if process is not self.process:
+                    return
+                if not data:
+                    self.process = None
+                    self.condition.notify_all()
+                    return
+                self.buffer += data
+                self.condition.notify_all()
+
+    def write(self, data):
+        process = self.process
+        if process is None:
+            raise discord.ClientException("TTS decoder is not running.")
+        process.stdin.write(data)
+
+    def read(self, start, size, end, complete, timeout):
+        """출력의 start 위치부터 size 바이트를 읽습니다.
+
+        complete가 참이면 end(음성의 끝 위치)를 넘지 않게 읽고, 끝에 닿았으면 빈 바이트를 반환합니다.
+        timeout 동안 읽을 데이터가 없으면 None을 반환합니다.
+        """
+        deadline = time.monotonic() + timeout
+        with self.condition:
+            while True:
+                # start 이전의 출력(앞 음성의 남은 무음)은 버립니다.
+                if self.buffer_offset < start:
+                    drop = min(start - self.buffer_offset, len(self.buffer))
+                    del self.buffer[:drop]
+                    self.buffer_offset += drop
+                if complete and start >= end:
+                    return b''
+                available = self.buffer_offset + len(self.buffer) - start
+                want = min(size, end - start) if complete else size
+                if self.buffer_offset == start and available >= want:
+                    data = bytes(self.buffer[:want])
+                    del self.buffer[:want]
+                    self.buffer_offset += want
+                    return data
+                if self.process is None or self.closed:
+                    return b''
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self.condition.wait(remaining)
+
+    def stop(self):
+        process = self.process
+        with self.condition:
+            self.process = None
+            self.condition.notify_all()
+        if process is not None:
+            try:
+                process.stdin.close()
+            except OSError:
+                pass
+            process.kill()
+            process.wait()
+
+    def close(self):
+        self.closed = True
+        self.stop()
+
+
+class DecodedClip(discord.AudioSource):
+    """PersistentDecoder로 스트림 하나를 재생하는 오디오 소스입니다.
+
+    입력 스레드가 스트림에서 mp3 조각을 읽어 프레임 단위로 디코더에 넣고,
+    read()는 이 음성의 프레임에 해당하는 출력 구간만 20ms씩 돌려줍니다.
+    """
+
+    def __init__(self, decoder, stream):
+        self.decoder = decoder
+        self.stream = stream
+        self.reader = FrameReader()
+        self.start = None  # 이 음성의 출력 시작 위치
+        self.end = 0  # 지금까지 넣은 프레임이 끝나는 출력 위치 (무음 패딩 제외)
+        self.started = threading.Event()
+        self.complete = False
+        self.position = None
+        self.stalled = 0.0  # 출력이 없어 무음으로 채운 시간
+        self.thread = threading.Thread(target=self.feed, daemon=True, name='tts-decoder-feeder')
+        self.thread.start()
+
+    def feed(self):
+        try:
+            with self.decoder.input_lock:
+                self.feed_frames()
+        except Exception as e:
+            logging.error(f"Error feeding TTS decoder: {e!r}")
+        finally:
+            with self.decoder.condition:
+                self.complete = True
+                self.decoder.condition.notify_all()
+            self.started.set()
+
+    def feed_frames(self):
+        decoder = self.decoder
+        while True:
+            data = self.stream.read(8192)
+            frames = self.reader.feed(data) if data else b''
+            if frames:
+                if self.start is None:
+                    # 형식이 바뀌었거나 디코더가 죽었으면 새로 띄웁니다.
+                    if decoder.process is None or decoder.format != self.reader.format:
+                        decoder.start(self.reader.format)
+                    self.start = self.position = decoder.input_offset(decoder.input_samples)
+                    self.started.set()
+                decoder.write(frames)
+                with decoder.condition:
+                    self.end = decoder.input_offset(decoder.input_samples + self.reader.samples)
+                    decoder.condition.notify_all()
+            if not data:
+                break
+
+        if self.start is not None:
+            # 무음 프레임으로 마지막 샘플을 밀어낸 뒤, 다음 음성은 무음이 끝나는 위치부터 읽습니다.
+            pad_frames = max(PAD_MIN_FRAMES, -(-PAD_BYTES // len(self.reader.silence)))
+            decoder.write(self.reader.silence * pad_frames)
+            decoder.input_samples += self.reader.samples + pad_frames * self.reader.samples_per_frame
+
+    def read(self):
+        self.started.wait()
+        if self.start is None:
+            return b''
+        with self.decoder.condition:
+            end, complete = self.end, self.complete
+        data = self.decoder.read(self.position, OUTPUT_FRAME_BYTES, end, complete, STALL_WAIT)
+        if data is None:
+            # 다음 조각이 아직 합성 중이거나 디코더가 늦으면 멈춰 있지 않고 무음을 보냅니다.
+            # (플레이어가 멈췄다가 밀린 프레임을 한꺼번에 보내 소리가 빨라지는 것을 막습니다.)
+            self.stalled += STALL_WAIT
+            if complete and self.stalled > READ_TIMEOUT:
+                logging.warning("Timed out waiting for TTS decoder output")
+                return b''
+            return bytes(OUTPUT_FRAME_BYTES)
+        self.stalled = 0.0
+        self.position += len(data)
+        if data and len(data) < OUTPUT_FRAME_BYTES:
+            data += bytes(OUTPUT_FRAME_BYTES - len(data))  # 마지막 20ms는 무음으로 채웁니다.
+        return data
+
+    def is_opus(self):
+        return False
+
+    def cleanup(self):
+        # 중간에 멈췄으면 스트림을 닫아 입력 스레드가 끝나게 합니다. 남은 출력은 다음 음성이 건너뜁니다.
+        self.stream.close()
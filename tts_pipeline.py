@@ -0,0 +1,284 @@
+# tts_pipeline.py
+# 서버 하나의 TTS 재생 대기열을 합성 단계와 재생 단계로 나눠 처리하는 모듈입니다.
+#
+# !말 요청은 텍스트 상태로 먼저 줄을 섭니다. 지금 재생 중인 음성이 나오는 동안 뒤의 K개를 미리
+# 합성해 두므로, 앞 음성이 끝나면 다음 음성을 기다림 없이 바로 재생할 수 있습니다.
+# 대기열이 가득 차면 아직 합성을 시작하지 않은 마지막 요청에 새 텍스트를 이어 붙이고,
+# 그것도 안 되면 새 요청을 받지 않습니다.
+#
+# 긴 텍스트는 문장/구 단위 조각으로 나눠 차례로 합성하고, 조각이 나오는 대로 하나의 스트림에
+# 이어 붙입니다. 첫 조각이 준비되면 나머지를 합성하는 동안 바로 재생을 시작합니다.
+import asyncio
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+
+QUEUE_DEPTH = int(os.getenv('TTS_QUEUE_DEPTH', 10))  # 서버 하나의 대기열에 들어갈 수 있는 최대 요청 수 (재생 중인 것 포함)
+LOOKAHEAD = int(os.getenv('TTS_LOOKAHEAD', 2))  # 재생 중인 것 외에 미리 합성해 둘 요청 수
+QUEUE_MAX_BYTES = 4 * 1024 * 1024  # 미리 합성해 둔 음성이 메모리에 차지할 수 있는 최대 크기
+MERGE_MAX_CHARS = 200  # 대기열이 가득 찼을 때 이어 붙인 텍스트의 최대 길이
+CHUNK_MAX_CHARS = 100  # 한 번에 합성할 조각의 최대 길이
+FIRST_AUDIO_TARGET = float(os.getenv('TTS_FIRST_AUDIO_TARGET', 1.5))  # 첫 조각 합성에 허용하는 목표 시간 (초)
+METRICS_HISTORY = 100  # 서버별로 보관할 최근 요청 측정값 수
+
+SENTENCE_END = re.compile(r'(?<=[.!?。！？…~\n])\s+|(?<=[.!?。！？…~])(?=[^\s\d.!?。！？…~])')
+PHRASE_END = re.compile(r'(?<=[,，、;:])\s*')
+
+
+def split_long(piece, max_chars):
+    # 구 단위로도 너무 길면 공백에서, 공백도 없으면 글자 수로 자릅니다.
+    parts = []
+    current = ''
+    for word in piece.split():
+        while len(word) > max_chars:
+            if current:
+                parts.append(current)
+                current = ''
+            parts.append(word[:max_chars])
+            word = word[max_chars:]
+        if current and len(current) + 1 + len(word) > max_chars:
+            parts.append(current)
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    if current:
+        parts.append(current)
+    return parts
+
+
+def split_text(text, max_chars=CHUNK_MAX_CHARS):
+    """텍스트를 문장/구 경계에서 max_chars 이하의 조각으로 나눕니다.
+
+    첫 소리가 빨리 나오도록 첫 조각은 첫 문장(또는 구) 하나만 쓰고,
+    그 뒤의 짧은 조각들은 합성 요청 수를 줄이기 위해 max_chars까지 합칩니다.
+    """
+    pieces = []
+    for sentence in SENTENCE_END.split(text):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        if len(sentence) <= max_chars:
+            pieces.append(sentence)
+            continue
+        for phrase in PHRASE_END.split(sentence):
+            phrase = phrase.strip()
+            if phrase:
+                pieces.extend([phrase] if len(phrase) <= max_chars else split_long(phrase, max_chars))
+
+    chunks = pieces[:1]
+    for piece in pieces[1:]:
+        if len(chunks) > 1 and len(chunks[-1]) + 1 + len(piece) <= max_chars:
+            chunks[-1] = f"{chunks[-1]} {piece}"
+        else:
+            chunks.append(piece)
+    return chunks
+
+
+class AudioStream:
+    """합성된 조각을 차례로 이어 붙이는 스트림입니다.
+
+    FFmpeg에 데이터를 넘기는 스레드가 read()로 다음 조각을 기다리며 읽고,
+    close()된 뒤 남은 데이터를 다 읽으면 빈 바이트를 돌려줘 재생이 끝납니다.
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.closed = False
+        self.written = 0
+        self.condition = threading.Condition()
+
+    def write(self, data):
+        with self.condition:
+            self.buffer += data
+            self.written += len(data)
+            self.condition.notify_all()
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def read(self, size=-1):
+        with self.condition:
+            while not self.buffer and not self.closed:
+                self.condition.wait()
+            if size < 0:
+                size = len(self.buffer)
+            data = bytes(self.buffer[:size])
+            # 읽은 부분은 바로 버려 재생이 진행될수록 메모리가 줄어듭니다.
+            del self.buffer[:size]
+            return data
+
+    @property
+    def pending(self):
+        # 아직 읽지 않고 메모리에 남아 있는 바이트 수
+        return len(self.buffer)
+
+
+class SpeechItem:
+    def __init__(self, ctx, voice_client, text):
+        self.ctx = ctx
+        self.voice_client = voice_client
+        self.text = text
+        self.task = None  # 합성 작업 (아직 시작하지 않았으면 None)
+        self.stream = AudioStream()
+        self.first_ready = None  # 첫 조각이 준비되면 완료되는 Future
+        self.chunks = 0
+        self.queued_at = time.perf_counter()
+        self.synthesis_started_at = None
+        self.first_chunk_at = None
+        self.synthesized_at = None
+        self.started_at = None
+
+    def metrics(self):
+        def since(start, end):
+            return None if start is None or end is None else end - start
+
+        return {
+            'chars': len(self.text),
+            'chunks': self.chunks,
+            'bytes': self.stream.written,
+            'first_chunk': since(self.synthesis_started_at, self.first_chunk_at),  # 합성 시작 -> 첫 조각 준비
+            'synthesis': since(self.synthesis_started_at, self.synthesized_at),  # 합성 시작 -> 모든 조각 합성
+            'first_audio': since(self.queued_at, self.started_at),  # 요청 -> 재생 시작 (앞 요청 재생 시간 포함)
+        }
+
+
+class SpeechPipeline:
+    def __init__(self, synthesize, play, depth=QUEUE_DEPTH, lookahead=LOOKAHEAD, max_bytes=QUEUE_MAX_BYTES):
+        self.synthesize = synthesize  # async (텍스트, 지금 재생할 요청인지) -> 음성 바이트
+        self.play = play  # async (voice_client, 음성 바이트) -> 재생이 끝나면 반환
+        self.depth = depth
+        self.lookahead = lookahead
+        self.max_bytes = max_bytes
+        self.items = deque()  # 재생을 기다리는 요청 (맨 앞이 재생 중이거나 다음에 재생할 것)
+        self.consumer = None
+        self.merged = 0
+        self.dropped = 0
+        self.metrics = deque(maxlen=METRICS_HISTORY)  # 최근 요청별 측정값
+
+    def put(self, ctx, voice_client, text):
+        """요청을 대기열에 넣습니다. 대기열이 가득 차서 받지 못하면 False를 반환합니다."""
+        if len(self.items) >= self.depth:
+            last = self.items[-1]
+            if last.task is None and last.voice_client is voice_client and len(last.text) + len(text) < MERGE_MAX_CHARS:
+                last.text = f"{last.text} {text}"
+                self.merged += 1
+                return True
+            self.dropped += 1
+            return False
+
+        self.items.append(SpeechItem(ctx, voice_client, text))
+        self.prefetch()
+        if self.consumer is None or self.consumer.done():
+            self.consumer = asyncio.create_task(self.run())
+        return True
+
+    def prefetch(self):
+        # 앞에서부터 (재생할 것 + LOOKAHEAD)개까지 합성을 시작합니다.
+        # 미리 합성해 둔 음성이 너무 크면 재생이 진행될 때까지 더 시작하지 않습니다.
+        ready = sum(item.stream.pending for item in self.items)
+        for index, item in enumerate(self.items):
+            if index > self.lookahead:
+                break
+            if item.task is None:
+                if index > 0 and ready >= self.max_bytes:
+                    break
+                item.first_ready = asyncio.get_running_loop().create_future()
+                item.task = asyncio.create_task(self.produce(item))
+                item.task.add_done_callback(lambda _: self.prefetch())
+
+    async def produce(self, item):
+        # 조각을 순서대로 합성해 스트림에 이어 붙입니다. 다음 조각은 앞 조각이 재생되는 동안 합성됩니다.
+        item.synthesis_started_at = time.perf_counter()
+        try:
+            for chunk in split_text(item.text):
+                # 맨 앞 요청의 조각은 다른 서버가 미리 합성해 두는 요청보다 먼저 합성되도록 표시합니다.
+                urgent = bool(self.items) and self.items[0] is item
+                item.stream.write(await self.synthesize(chunk, urgent))
+                item.chunks += 1
+                if not item.first_ready.done():
+                    item.first_chunk_at = time.perf_counter()
+                    item.first_ready.set_result(None)
+            if not item.first_ready.done():
+                # 공백뿐인 텍스트처럼 합성할 조각이 없으면 재생 단계가 영원히 기다리지 않도록 실패로 알립니다.
+                raise ValueError("읽을 내용이 없어요")
+            item.synthesized_at = time.perf_counter()
+        except Exception as e:
+            if not item.first_ready.done():
+                item.first_ready.set_exception(e)
+            else:
+                # 이미 재생 중이면 합성된 조각까지만 재생합니다.
+                logging.error(f"TTS synthesis failed after {item.chunks} chunks for text: {item.text}: {e!r}")
+        finally:
+            item.stream.close()
+
+    async def run(self):
+        while self.items:
+            item = self.items[0]
+            self.prefetch()
+            try:
+                await item.first_ready
+            except asyncio.CancelledError:
+                if self.items and self.items[0] is item:
+                    raise  # 대기열이 비워진 게 아니라 이 작업 자체가 취소됨
+                continue
+            except asyncio.TimeoutError:
+                logging.error(f"TTS synthesis timed out for text: {item.text}")
+                await self.notify(item, "음성을 만드는 데 시간이 너무 오래 걸려요. 잠시 후에 다시 시도해 주세요...")
+                self.finish(item)
+                continue
+            except Exception as e:
+                logging.error(f"TTS synthesis failed for text: {item.text}: {e}")
+                await self.notify(item, f"음성을 만들지 못했어요: {e}")
+                self.finish(item)
+                continue
+
+            if item.voice_client.is_connected():
+                item.started_at = time.perf_counter()
+                try:
+                    await self.play(item.voice_client, item.stream)
+                except Exception as e:
+                    logging.error(f"Error occurred while playing audio: {e}")
+                self.record(item)
+            else:
+                logging.error("Voice client is not connected. Skipping queued TTS.")
+            self.finish(item)
+
+    def record(self, item):
+        metrics = item.metrics()
+        self.metrics.append(metrics)
+        logging.info(
+            f"TTS metrics: first audio {metrics['first_audio']:.2f}s, first chunk {metrics['first_chunk']:.2f}s, "
+            f"synthesis {metrics['synthesis'] or 0:.2f}s, {metrics['chunks']} chunks, {metrics['chars']} chars"
+        )
+        if metrics['first_chunk'] > FIRST_AUDIO_TARGET:
+            logging.warning(f"TTS first chunk took {metrics['first_chunk']:.2f}s (target {FIRST_AUDIO_TARGET:.2f}s)")
+
+    def finish(self, item):
+        # 재생하는 동안 대기열이 비워졌을 수 있으므로 맨 앞이 이 항목일 때만 뺍니다.
+        if self.items and self.items[0] is item:
+            self.items.popleft()
+
+    async def notify(self, item, message):
+        try:
+            await item.ctx.send(message)
+        except Exception as e:
+            logging.error(f"Failed to send TTS error message: {e}")
+
+    def clear(self):
+        """대기 중인 요청을 모두 버리고 진행 중인 합성을 취소합니다. 재생 중인 음성은 호출한 쪽에서 멈춥니다."""
+        for item in self.items:
+            if item.task is not None:
+                item.task.cancel()
+                item.first_ready.cancel()
+            # FFmpeg에 데이터를 넘기던 스레드가 기다리지 않고 끝나도록 스트림을 닫습니다.
+            item.stream.close()
+        self.items.clear()
+        logging.info("Cleared TTS queue")
+
+    def __len__(self):
+        return len(self.items)
@@ -0,0 +1,262 @@
+# tts_worker.py
+# TTS 합성을 봇 프로세스 밖의 작업 프로세스 풀에서 실행하는 모듈입니다.
+#
+# 합성이 느리거나 CPU를 많이 써도 게이트웨이 하트비트와 명령 처리가 같은 프로세스에서 밀리지 않도록,
+# VoiceManagement는 작업만 넘기고 결과를 await합니다.
+# 합성 방법은 백엔드로 바꿀 수 있습니다 (TTS_BACKEND):
+#   gtts     Google TTS (기본값, 네트워크 필요)
+#   silence  글자 수에 비례하는 길이의 무음 mp3 (네트워크와 ffmpeg 없이 동작)
+#   tone     글자 수에 비례하는 길이의 사인파 mp3 (ffmpeg 필요)
+#   모듈:클래스  TTSBackend를 상속한 직접 만든 백엔드 (예: my_tts:MyBackend)
+import asyncio
+import heapq
+import importlib
+import io
+import itertools
+import logging
+import multiprocessing
+import os
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+TTS_BACKEND = os.getenv('TTS_BACKEND', 'gtts')  # 합성 백엔드 이름
+# 작업 프로세스 하나가 약 30MB를 쓰므로 코어 수만큼, 최대 4개까지만 띄우고
+# 네트워크를 기다리는 동시 작업은 프로세스 안의 스레드로 늘립니다.
+TTS_WORKERS = int(os.getenv('TTS_WORKERS', min(4, os.cpu_count() or 1)))  # 합성 작업 프로세스 수
+TTS_WORKER_THREADS = int(os.getenv('TTS_WORKER_THREADS', 4))  # 작업 프로세스 하나가 동시에 처리하는 작업 수
+JOB_TIMEOUT = 15  # 작업이 실행되기 시작한 뒤 결과를 기다리는 최대 시간 (초)
+GTTS_TIMEOUT = 15  # gTTS 요청 하나에 허용하는 최대 시간 (초)
+STUB_SECONDS_PER_CHAR = float(os.getenv('TTS_STUB_SECONDS_PER_CHAR', 0.12))  # 대체 백엔드가 글자당 만드는 음성 길이 (초)
+STUB_MIN_SECONDS = 0.3  # 대체 백엔드가 만드는 음성의 최소 길이 (초)
+STUB_DELAY = float(os.getenv('TTS_STUB_DELAY', 0))  # 대체 백엔드가 외부 서비스 응답 시간을 흉내 내며 기다리는 시간 (초)
+TONE_FFMPEG = os.getenv('TTS_TONE_FFMPEG', 'ffmpeg')  # tone 백엔드가 쓸 ffmpeg 실행 파일
+
+# gTTS 출력과 같은 MPEG-2 Layer III 24kHz 모노 32kbps 프레임 헤더 (CRC와 패딩 없음)
+SILENT_FRAME_HEADER = bytes((0xFF, 0xF3, 0x44, 0xC0))
+SILENT_FRAME_BYTES = 72 * 32000 // 24000  # 프레임 하나의 크기 (96바이트)
+SILENT_FRAME_SECONDS = 576 / 24000  # 프레임 하나의 길이 (24ms)
+
+
+class TTSBackend:
+    """합성 백엔드의 기본 클래스입니다. 작업 프로세스마다 하나씩 만들어 여러 스레드에서 함께 씁니다."""
+
+    def synthesize(self, text, lang):
+        """text를 합성한 mp3 바이트를 반환합니다."""
+        raise NotImplementedError
+
+
+class GTTSBackend(TTSBackend):
+    def synthesize(self, text, lang):
+        # 이 백엔드를 쓰는 작업 프로세스에서만 gTTS를 불러옵니다.
+        from gtts import gTTS
+
+        buffer = io.BytesIO()
+        gTTS(text, lang=lang, timeout=GTTS_TIMEOUT).write_to_fp(buffer)
+        return buffer.getvalue()
+
+
+class StubBackend(TTSBackend):
+    # 네트워크 없이 부하 테스트를 할 수 있도록 글자 수에 비례하는 길이의 음성을 만듭니다.
+    def duration(self, text):
+        return max(STUB_MIN_SECONDS, len(text) * STUB_SECONDS_PER_CHAR)
+
+    def synthesize(self, text, lang):
+        if STUB_DELAY:
+            time.sleep(STUB_DELAY)
+        return self.render(self.duration(text))
+
+    def render(self, seconds):
+        raise NotImplementedError
+
+
+class SilenceBackend(StubBackend):
+    def render(self, seconds):
+        # 사이드 정보와 본문이 모두 0인 프레임은 무음으로 디코딩되므로 인코더가 필요 없습니다.
+        frames = max(1, round(seconds / SILENT_FRAME_SECONDS))
+        return (SILENT_FRAME_HEADER + bytes(SILENT_FRAME_BYTES - 4)) * frames
+
+
+class ToneBackend(StubBackend):
+    def render(self, seconds):
+        return subprocess.run(
+            [TONE_FFMPEG, '-loglevel', 'error', '-f', 'lavfi', '-i', f'sine=frequency=440:duration={seconds:.3f}',
+             '-ar', '24000', '-ac', '1', '-b:a', '32k', '-f', 'mp3', 'pipe:1'],
+            capture_output=True, check=True,
+        ).stdout
+
+
+BACKENDS = {
+    'gtts': GTTSBackend,
+    'silence': SilenceBackend,
+    'tone': ToneBackend,
+}
+
+
+def load_backend(name):
+    # 등록된 이름이 아니면 '모듈:클래스' 형식으로 보고 불러옵니다.
+    if name in BACKENDS:
+        return BACKENDS[name]
+    module_name, _, class_name = name.partition(':')
+    if not class_name:
+        raise ValueError(f"Unknown TTS backend: {name}")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def worker_main(backend_name, threads, conn):
+    # 작업 프로세스의 본체입니다. gTTS는 대부분 네트워크 응답을 기다리므로
+    # 프로세스 하나가 스레드 여러 개로 작업을 동시에 처리합니다.
+    backend = load_backend(backend_name)()
+    send_lock = threading.Lock()
+
+    def run(job_id, text, lang):
+        try:
+            result = (job_id, backend.synthesize(text, lang), None)
+        except Exception as e:
+            # 백엔드 예외는 피클되지 않을 수 있으므로 메시지로 돌려줍니다.
+            result = (job_id, None, f"{type(e).__name__}: {e}")
+        with send_lock:
+            try:
+                conn.send(result)
+            except OSError:
+                pass  # 봇 프로세스가 먼저 종료됨
+
+    executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='tts')
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, OSError):
+            break
+        if job is None:
+            break
+        executor.submit(run, *job)
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+class Worker:
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+        self.running = {}  # 작업 번호 -> (Future, 시간 제한 타이머)
+
+
+class TTSWorkerPool:
+    """작업 프로세스에 합성을 나눠 맡기는 풀입니다.
+
+    대기 중인 작업은 봇 프로세스의 우선순위 큐에 두고, 작업 프로세스에 빈 스레드가 있을 때만 넘깁니다.
+    그래서 지금 재생할 요청(urgent)이 미리 합성해 두는 요청보다 먼저 실행되고,
+    시간 제한은 큐에서 기다린 시간을 빼고 작업이 실행되기 시작한 때부터 잽니다.
+    """
+
+    def __init__(self, backend_name=TTS_BACKEND, workers=TTS_WORKERS, threads=TTS_WORKER_THREADS, timeout=JOB_TIMEOUT):
+        self.backend_name = backend_name
+        self.workers = workers
+        self.threads = threads
+        self.timeout = timeout
+        load_backend(backend_name)  # 설정이 잘못되었으면 작업을 넘기기 전에 바로 알립니다.
+        self.context = multiprocessing.get_context('spawn')
+        self.loop = None
+        self.processes = []  # 첫 작업이 들어올 때 띄웁니다.
+        self.queue = []  # (우선순위, 작업 번호, 텍스트, 언어, Future) 힙
+        self.counter = itertools.count()
+        self.closed = False
+
+    def spawn(self):
+        # 이벤트 루프와 스레드가 도는 봇 프로세스를 fork하지 않도록 spawn으로 새 프로세스를 띄웁니다.
+        parent_conn, child_conn = self.context.Pipe()
+        process = self.context.Process(
+            target=worker_main, args=(self.backend_name, self.threads, child_conn), name='tts-worker', daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        worker = Worker(process, parent_conn)
+        threading.Thread(target=self.read_results, args=(worker,), name='tts-results', daemon=True).start()
+        return worker
+
+    def read_results(self, worker):
+        # 작업 프로세스가 보낸 결과를 받아 이벤트 루프로 넘깁니다. 연결이 끊기면 프로세스가 종료된 것입니다.
+        while True:
+            try:
+                job_id, audio, error = worker.conn.recv()
+            except (EOFError, OSError):
+                break
+            self.call_soon(self.finish, worker, job_id, audio, error)
+        worker.process.join(1)  # 종료 코드를 남길 수 있도록 프로세스를 정리합니다.
+        self.call_soon(self.worker_died, worker)
+
+    def call_soon(self, callback, *args):
+        try:
+            self.loop.call_soon_threadsafe(callback, *args)
+        except RuntimeError:
+            pass  # 이벤트 루프가 이미 닫힘
+
+    async def synthesize(self, text, lang, urgent=False):
+        """작업 프로세스에 합성을 맡기고 mp3 바이트를 기다립니다. urgent면 대기 중인 다른 작업보다 먼저 실행합니다."""
+        if self.closed:
+            raise RuntimeError("TTS worker pool is closed")
+        if not self.processes:
+            # 프로세스를 띄우다 실패하면 비어 있는 채로 남아 다음 요청 때 다시 시도합니다.
+            self.loop = asyncio.get_running_loop()
+            self.processes = [self.spawn() for _ in range(self.workers)]
+        future = self.loop.create_future()
+        heapq.heappush(self.queue, (0 if urgent else 1, next(self.counter), text, lang, future))
+        self.dispatch()
+        return await future
+
+    def dispatch(self):
+        while self.queue:
+            worker = min(self.processes, key=lambda worker: len(worker.running))
+            if len(worker.running) >= self.threads:
+                return
+            _, job_id, text, lang, future = heapq.heappop(self.queue)
+            if future.done():
+                continue  # 기다리는 동안 대기열이 비워져 취소된 작업
+            try:
+                worker.conn.send((job_id, text, lang))
+            except OSError as e:
+                future.set_exception(RuntimeError(f"TTS worker is not available: {e}"))
+                continue
+            timer = self.loop.call_later(self.timeout, self.expire, future)
+            worker.running[job_id] = (future, timer)
+
+    def expire(self, future):
+        # 결과를 기다리는 쪽만 먼저 실패시킵니다. 스레드는 작업이 끝날 때까지 쓰이므로 자리는 결과가 올 때 비웁니다.
+        if not future.done():
+            future.set_exception(asyncio.TimeoutError())
+
+    def finish(self, worker, job_id, audio, error):
+        future, timer = worker.running.pop(job_id, (None, None))
+        if future is not None:
+            timer.cancel()
+            if not future.done():
+                if error is None:
+                    future.set_result(audio)
+                else:
+                    future.set_exception(RuntimeError(error))
+        self.dispatch()
+
+    def worker_died(self, worker):
+        if self.closed or worker not in self.processes:
+            return
+        logging.error(f"TTS worker process died (exit code {worker.process.exitcode}). Restarting it")
+        for future, timer in worker.running.values():
+            timer.cancel()
+            if not future.done():
+                future.set_exception(RuntimeError("TTS worker process died"))
+        worker.running.clear()
+        self.processes[self.processes.index(worker)] = self.spawn()
+        self.dispatch()
+
+    def close(self):
+        self.closed = True
+        for *_, future in self.queue:
+            future.cancel()
+        self.queue.clear()
+        for worker in self.processes:
+            try:
+                worker.conn.send(None)
+            except OSError:
+                pass
+            worker.conn.close()
+        self.processes = []
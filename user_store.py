@@ -0,0 +1,87 @@
+# user_store.py
+# 로스트아크 닉네임 등록 정보를 SQLite(WAL 모드)에 저장하는 모듈입니다.
+# 등록/해제할 때마다 해당 사용자 한 줄만 바꾸며, 쓰기는 전용 스레드 하나에서 순서대로 처리해
+# 이벤트 루프를 막지 않습니다. 트랜잭션 단위로 기록되므로 쓰는 도중에 죽어도 파일이 깨지지 않습니다.
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+USER_DB_FILE = os.getenv('USER_DB_FILE', 'user_character_data.db')
+
+
+class UserDataStore:
+    def __init__(self, path=USER_DB_FILE):
+        self.path = path
+        self.connection = None
+        # 스레드가 하나뿐이므로 쓰기 순서가 요청한 순서와 같습니다.
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='user-store')
+
+    def open(self):
+        self.connection = sqlite3.connect(self.path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS registrations ("
+            " user_id INTEGER NOT NULL,"
+            " guild_id INTEGER NOT NULL,"
+            " data TEXT NOT NULL,"
+            " PRIMARY KEY (user_id, guild_id))"
+        )
+        self.connection.commit()
+
+    def migrate_json(self, json_path):
+        """예전 "uid-gid" 형식의 JSON 파일을 한 번만 옮깁니다. DB에 데이터가 있으면 아무것도 하지 않습니다."""
+        if not os.path.exists(json_path):
+            return 0
+        if self.connection.execute("SELECT 1 FROM registrations LIMIT 1").fetchone():
+            return 0
+
+        with open(json_path, 'r') as file:
+            rows = [
+                (*map(int, key.split('-')), json.dumps(value, ensure_ascii=False))
+                for key, value in json.load(file).items()
+            ]
+        if not rows:
+            return 0
+
+        with self.connection:
+            self.connection.executemany("INSERT INTO registrations (user_id, guild_id, data) VALUES (?, ?, ?)", rows)
+        os.replace(json_path, f"{json_path}.migrated")
+        logging.info(f"Migrated {len(rows)} registrations from {json_path} to {self.path}")
+        return len(rows)
+
+    def load_all(self):
+        return {
+            (user_id, guild_id): json.loads(data)
+            for user_id, guild_id, data in self.connection.execute("SELECT user_id, guild_id, data FROM registrations")
+        }
+
+    def _write(self, key, data):
+        try:
+            with self.connection:
+                if data is None:
+                    self.connection.execute("DELETE FROM registrations WHERE user_id = ? AND guild_id = ?", key)
+                else:
+                    self.connection.execute(
+                        "INSERT INTO registrations (user_id, guild_id, data) VALUES (?, ?, ?)"
+                        " ON CONFLICT (user_id, guild_id) DO UPDATE SET data = excluded.data",
+                        (*key, data),
+                    )
+        except sqlite3.Error as e:
+            logging.error(f"Error saving user data for {key}: {e}")
+
+    def save(self, key, value):
+        """등록 정보 한 건을 저장합니다. value가 None이면 삭제합니다. 쓰기는 전용 스레드에서 진행됩니다."""
+        # 지금 시점의 값을 저장하도록 직렬화는 호출한 쪽에서 바로 합니다.
+        data = None if value is None else json.dumps(value, ensure_ascii=False)
+        return asyncio.get_running_loop().run_in_executor(self.executor, self._write, key, data)
+
+    def close(self):
+        # 남은 쓰기를 모두 마친 뒤 연결을 닫습니다.
+        self.executor.shutdown(wait=True)
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
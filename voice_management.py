@@ -1,28 +1,123 @@
 import discord
-from discord.ext import commands, tasks
-from gtts import gTTS
+from discord.ext import commands
 import os
 import asyncio
-import uuid
 import logging
-from collections import deque
+from tts_cache import TTSCache, cache_key
+from tts_decoder import DecodedClip, PersistentDecoder
+from tts_pipeline import SpeechPipeline
+from tts_worker import TTSWorkerPool
+from voice_session import VoiceSession
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO)
 
+# TTS 합성 설정
+TTS_LANG = 'ko'  # TTS 언어
+TTS_TIMEOUT = 15  # 합성이 작업 프로세스에서 실행되기 시작한 뒤 허용하는 최대 시간 (초)
+# 서버마다 ffmpeg 하나를 계속 띄워 두고 재사용합니다. '0'이면 음성마다 ffmpeg를 새로 띄웁니다.
+TTS_PERSISTENT_DECODER = os.getenv('TTS_PERSISTENT_DECODER', '1') != '0'
+
 class VoiceManagement(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.voice_clients = {}
-        self.idle_time = 300  # 5분 (300초) 동안 아무도 없을 때 봇이 나가기 전 대기 시간
-        self.queues = {}  # 서버별 큐를 관리하는 딕셔너리
-        self.moving_channels = {}  # 채널 이동 중인 상태를 관리하는 딕셔너리
+        self.sessions = {}  # 서버별 음성 세션 (연결, TTS 대기열, 디코더, 유휴 타이머)
+        self.tts_workers = TTSWorkerPool(timeout=TTS_TIMEOUT)  # 합성은 봇 프로세스 밖의 작업 프로세스에서 합니다.
+        self.tts_cache = TTSCache()  # 자주 쓰는 문장은 다시 합성하지 않습니다.
+
+    async def cog_unload(self):
+        for guild_id in list(self.sessions):
+            await self.end_session(guild_id)
+        self.tts_workers.close()
+
+    def get_session(self, guild):
+        session = self.sessions.get(guild.id)
+        if session is None:
+            session = VoiceSession(guild, SpeechPipeline(self.synthesize, self.play_audio), self.end_session)
+            self.sessions[guild.id] = session
+            # 연결에 실패해도 세션이 남지 않도록 만들 때부터 타이머를 겁니다.
+            session.touch()
+        return session
+
+    async def end_session(self, guild_id):
+        # 유휴 타이머, !저리가, 강제 퇴장이 겹쳐도 한 번만 정리되도록 먼저 목록에서 뺍니다.
+        session = self.sessions.pop(guild_id, None)
+        if session is not None:
+            await session.close()
+            logging.info(f"Closed voice session for guild {guild_id}")
+
+    async def synthesize(self, text, urgent=False):
+        # 메모리 캐시에 있으면 스레드를 거치지 않고 바로 돌려줍니다.
+        key = cache_key(text, TTS_LANG)
+        audio = self.tts_cache.get(key, disk=False)
+        if audio is not None:
+            return audio
+
+        # 디스크 캐시는 파일을 읽으므로 스레드에서 확인합니다.
+        if self.tts_cache.directory:
+            audio = await asyncio.to_thread(self.tts_cache.get, key)
+        else:
+            audio = self.tts_cache.get(key)
+        if audio is not None:
+            return audio
+
+        # 합성이 오래 걸려도 하트비트와 다른 서버의 명령이 멈추지 않도록 작업 프로세스에 맡기고 기다립니다.
+        # 시간 제한은 풀이 작업을 실제로 실행하기 시작할 때부터 잽니다.
+        audio = await self.tts_workers.synthesize(text, TTS_LANG, urgent)
+        if self.tts_cache.directory:
+            await asyncio.to_thread(self.tts_cache.put, key, audio)
+        else:
+            self.tts_cache.put(key, audio)
+        return audio
+
+    async def play_audio(self, voice_client, stream):
+        # 합성되는 대로 이어 붙는 mp3 스트림을 파이프로 FFmpeg에 넘겨 재생하고, 재생이 끝날 때까지 기다립니다.
+        loop = asyncio.get_running_loop()
+        done = loop.create_future()
+
+        def after_playing(error):
+            if error:
+                logging.error(f"Error playing audio: {error}")
+            loop.call_soon_threadsafe(lambda: done.done() or done.set_result(None))
+
+        if TTS_PERSISTENT_DECODER:
+            decoder = self.get_session(voice_client.guild).get_decoder(PersistentDecoder)
+            source = DecodedClip(decoder, stream)
+        else:
+            source = discord.FFmpegPCMAudio(stream, pipe=True)
+        voice_client.play(source, after=after_playing)
+        logging.info("Playing TTS stream")
+        await done
 
     @commands.Cog.listener()
-    async def on_ready(self):
-        if not self.check_idle.is_running():
-            self.check_idle.start()
-            logging.info("Started idle check task")
+    async def on_voice_state_update(self, member, before, after):
+        session = self.sessions.get(member.guild.id)
+        if session is None or before.channel == after.channel:
+            return  # 음소거 등 채널이 그대로인 변경은 무시합니다.
+
+        if member.id == self.bot.user.id:
+            if after.channel is None and not session.moving:
+                # 강제로 연결이 끊긴 경우에도 대기열과 디코더를 정리합니다.
+                await self.end_session(member.guild.id)
+            else:
+                session.refresh()
+            return
+
+        voice_client = session.voice_client
+        if voice_client and voice_client.channel in (before.channel, after.channel):
+            session.refresh()
+
+    async def connect(self, ctx, channel):
+        # 세션을 통해 연결하거나 채널을 옮깁니다. 실패하면 사용자에게 알리고 None을 반환합니다.
+        try:
+            return await self.get_session(ctx.guild).connect(channel)
+        except discord.errors.ClientException as e:
+            logging.error(f"Failed to connect to or move to channel: {e}")
+            await ctx.send(f"채널에 연결할 수 없어요: {e}")
+        except Exception as e:
+            logging.error(f"Unexpected error occurred while connecting to or moving to channel: {e}")
+            await ctx.send(f"예기치 않은 오류가 발생했어요: {e}")
+        return None
 
     @commands.command(name="말")
     async def say(self, ctx, *, text: str):
@@ -30,127 +125,36 @@ class VoiceManagement(commands.Cog):
 
         if ctx.author.voice and ctx.author.voice.channel:
             user_channel = ctx.author.voice.channel
-            guild_id = ctx.guild.id
-
             logging.info(f"User is in channel: {user_channel.name}")
 
+            session = self.get_session(ctx.guild)
             # 현재 봇이 다른 채널로 이동 중인지 확인
-            if guild_id in self.moving_channels and self.moving_channels[guild_id]:
+            if session.moving:
                 await ctx.send("채널을 이동 중입니다. 잠시 후에 다시 시도해 주세요...")
                 return
 
-            voice_client = ctx.voice_client
-
-            try:
-                if voice_client and voice_client.is_connected():
-                    if voice_client.channel != user_channel:
-                        # 채널 이동 중임을 표시
-                        self.moving_channels[guild_id] = True
-                        await voice_client.disconnect()
-                        voice_client = await user_channel.connect()
-                        logging.info(f"Moved to user's channel: {user_channel.name}")
-                        # 채널 이동 후 잠시 대기
-                        await asyncio.sleep(1)  # 1초 대기
-                        # 채널 이동 완료 후 표시 해제
-                        self.moving_channels[guild_id] = False
-                else:
-                    voice_client = await user_channel.connect()
-                    logging.info(f"Connected to channel: {user_channel.name}")
-            except discord.errors.ClientException as e:
-                logging.error(f"Failed to connect to or move to channel: {e}")
-                await ctx.send(f"채널에 연결할 수 없어요: {e}")
+            voice_client = await self.connect(ctx, user_channel)
+            if voice_client is None:
                 return
-            except Exception as e:
-                logging.error(f"Unexpected error occurred while connecting to or moving to channel: {e}")
-                await ctx.send(f"예기치 않은 오류가 발생했어요: {e}")
-                return
-
-            if guild_id not in self.queues:
-                self.queues[guild_id] = deque()
-
-            # 고유한 파일 이름 생성
-            unique_filename = f"tts_{uuid.uuid4()}.mp3"
-
-            # 텍스트를 음성으로 변환하여 고유한 mp3 파일로 저장
-            tts = gTTS(text, lang='ko')
-            tts.save(unique_filename)
-            logging.info(f"TTS generated for text: {text} with file name: {unique_filename}")
-
-            # 요청을 큐에 추가
-            self.queues[guild_id].append((voice_client, unique_filename))
-
-            # 봇이 마지막으로 사용된 시간을 갱신
-            self.voice_clients[user_channel] = {
-                'client': voice_client,
-                'last_active': asyncio.get_event_loop().time()
-            }
-
-            # 큐가 비어 있거나 봇이 아직 음성을 재생 중이지 않다면 재생 시작
-            if not voice_client.is_playing():
-                await self.play_next_in_queue(guild_id)
 
+            # 텍스트를 대기열에 넣으면 합성과 재생은 대기열이 순서대로 처리합니다.
+            if not session.pipeline.put(ctx, voice_client, text):
+                await ctx.send("재생 대기열이 가득 찼어요. 잠시 후에 다시 시도해 주세요...")
         else:
             logging.info("User is not in a voice channel")
             await ctx.send("음성 채널에 접속한 상태여야 해요...")
 
-    async def play_next_in_queue(self, guild_id):
-        if self.queues[guild_id]:
-            voice_client, filename = self.queues[guild_id][0]  # 큐의 첫 번째 항목 가져오기
-
-            def after_playing(error):
-                if error:
-                    logging.error(f"Error playing file: {error}")
-
-                # 큐에서 첫 번째 항목 제거
-                self.queues[guild_id].popleft()
-
-                # 파일 삭제
-                if os.path.exists(filename):
-                    os.remove(filename)
-                    logging.info(f"TTS file {filename} removed")
-
-                # 다음 항목 재생
-                if self.queues[guild_id]:
-                    asyncio.run_coroutine_threadsafe(self.play_next_in_queue(guild_id), self.bot.loop)
-
-            # 음성 파일을 재생
-            if voice_client.is_connected() and not voice_client.is_playing():
-                try:
-                    voice_client.play(discord.FFmpegPCMAudio(filename), after=after_playing)
-                    logging.info(f"Playing TTS for file: {filename}")
-                except Exception as e:
-                    logging.error(f"Error occurred while playing file: {e}")
-                    after_playing(e)  # 오류가 발생하면 큐에서 제거하고 다음 파일 재생
-            else:
-                logging.error("Voice client is not connected or is already playing.")
-        else:
-            logging.info(f"Queue for guild {guild_id} is empty")
-
     @commands.command(name="저리가")
     async def leave(self, ctx):
         logging.info("leave command called")
-        
-        if ctx.voice_client:  # 봇이 음성 채널에 연결되어 있는 경우
-            guild_id = ctx.guild.id
-            channel = ctx.voice_client.channel
-
-            # 현재 음성 재생을 중단하고 큐를 초기화
-            if guild_id in self.queues:
-                self.queues[guild_id].clear()
-                logging.info(f"Cleared queue for guild {guild_id}")
-
-            if ctx.voice_client.is_playing():
-                ctx.voice_client.stop()
-                logging.info("Stopped playing audio")
-
-            await ctx.voice_client.disconnect()
-            logging.info("Disconnected from voice channel")
-            
-            # 연결이 끊어진 채널 정보를 voice_clients에서 제거
-            if channel in self.voice_clients:
-                del self.voice_clients[channel]
-                logging.info(f"Removed channel {channel.name} from voice_clients")
 
+        if ctx.voice_client:  # 봇이 음성 채널에 연결되어 있는 경우
+            if ctx.guild.id in self.sessions:
+                # 현재 음성 재생을 중단하고 큐를 비운 뒤 연결을 끊습니다.
+                await self.end_session(ctx.guild.id)
+            else:
+                await ctx.voice_client.disconnect()
+                logging.info("Disconnected from voice channel")
             await ctx.send("음성 채널에서 나왔어요...")
         else:
             await ctx.send("봇이 음성 채널에 연결되어 있지 않아요...")
@@ -158,60 +162,28 @@ class VoiceManagement(commands.Cog):
     @commands.command(name="이리와")
     async def join(self, ctx):
         logging.info("join command called")
-        
+
         if ctx.author.voice and ctx.author.voice.channel:
             channel = ctx.author.voice.channel
-            guild_id = ctx.guild.id
             logging.info(f"User is in channel: {channel.name}")
 
-            if guild_id in self.moving_channels and self.moving_channels[guild_id]:
+            session = self.get_session(ctx.guild)
+            if session.moving:
                 await ctx.send("채널을 이동 중입니다. 잠시 후에 다시 시도해 주세요...")
                 return
 
-            try:
-                if ctx.voice_client and ctx.voice_client.is_connected():
-                    if ctx.voice_client.channel == channel:
-                        await ctx.send(f"{channel.name} 채널에 이미 연결되어 있어요...")
-                        return
-                    else:
-                        self.moving_channels[guild_id] = True
-                        await ctx.voice_client.move_to(channel)
-                        logging.info(f"Moved to channel: {channel.name}")
-                        await asyncio.sleep(1)  # 1초 대기
-                        self.moving_channels[guild_id] = False
-                else:
-                    voice_client = await channel.connect()
-                    logging.info(f"Connected to channel: {channel.name}")
-                    self.voice_clients[channel] = {
-                        'client': voice_client,
-                        'last_active': asyncio.get_event_loop().time()
-                    }
-            except discord.errors.ClientException as e:
-                logging.error(f"Failed to connect to or move to channel: {e}")
-                await ctx.send(f"채널에 연결할 수 없어요: {e}")
-                return
-            except Exception as e:
-                logging.error(f"Unexpected error occurred while connecting to or moving to channel: {e}")
-                await ctx.send(f"예기치 않은 오류가 발생했어요: {e}")
+            voice_client = session.voice_client
+            if voice_client and voice_client.is_connected() and voice_client.channel == channel:
+                session.refresh()
+                await ctx.send(f"{channel.name} 채널에 이미 연결되어 있어요...")
                 return
 
+            if await self.connect(ctx, channel) is None:
+                return
             await ctx.send(f"{channel.name} 채널로 갔어요...")
         else:
             logging.info("User is not in a voice channel")
             await ctx.send("음성 채널에 접속한 상태여야 해요...")
 
-    @tasks.loop(seconds=10)
-    async def check_idle(self):
-        current_time = asyncio.get_event_loop().time()
-        for channel, data in list(self.voice_clients.items()):
-            if current_time - data['last_active'] > self.idle_time:
-                await data['client'].disconnect()
-                logging.info(f"Disconnected from {channel.name} due to inactivity")
-                del self.voice_clients[channel]
-
-    @check_idle.before_loop
-    async def before_check_idle(self):
-        await self.bot.wait_until_ready()
-
 async def setup(bot):
-    await bot.add_cog(VoiceManagement(bot))
\ No newline at end of file
+    await bot.add_cog(VoiceManagement(bot))
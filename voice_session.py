@@ -0,0 +1,90 @@
+# voice_session.py
+# 서버 하나의 음성 연결과 거기에 딸린 TTS 대기열, 디코더, 유휴 타이머를 함께 관리하는 모듈입니다.
+#
+# 유휴 연결은 주기적으로 모든 연결을 훑어 찾지 않습니다. 서버마다 loop.call_later 타이머 하나만 두고,
+# 명령이 오거나 음성 상태가 바뀌면 그 타이머를 다시 걸기만 하므로 이벤트 하나에 드는 비용이 O(1)입니다.
+# 연결은 guild.voice_client를 그대로 쓰므로 따로 들고 있는 채널 목록이 오래되어 어긋날 일이 없습니다.
+import asyncio
+import logging
+import os
+
+IDLE_TIMEOUT = int(os.getenv('VOICE_IDLE_TIMEOUT', 300))  # 마지막 활동 후 연결을 끊기까지 기다리는 시간 (초)
+EMPTY_TIMEOUT = int(os.getenv('VOICE_EMPTY_TIMEOUT', 60))  # 채널에 사람이 아무도 없을 때 연결을 끊기까지 기다리는 시간 (초)
+
+
+class VoiceSession:
+    def __init__(self, guild, pipeline, on_idle):
+        self.guild = guild
+        self.pipeline = pipeline  # 이 서버의 TTS 대기열
+        self.on_idle = on_idle  # async (guild_id) -> 유휴 시간이 지나면 부를 정리 함수
+        self.decoder = None  # 처음 재생할 때 띄우는 ffmpeg 디코더
+        self.timer = None
+        self.lock = asyncio.Lock()  # 연결과 채널 이동을 한 번에 하나씩만 합니다.
+
+    @property
+    def voice_client(self):
+        return self.guild.voice_client
+
+    @property
+    def moving(self):
+        return self.lock.locked()
+
+    async def connect(self, channel):
+        """channel에 연결합니다. 다른 채널에 연결되어 있으면 연결을 끊지 않고 옮깁니다."""
+        async with self.lock:
+            voice_client = self.voice_client
+            if voice_client and voice_client.is_connected():
+                if voice_client.channel != channel:
+                    await voice_client.move_to(channel)
+                    logging.info(f"Moved to channel: {channel.name}")
+            else:
+                voice_client = await channel.connect()
+                logging.info(f"Connected to channel: {channel.name}")
+            self.refresh()
+            return voice_client
+
+    def touch(self, timeout=IDLE_TIMEOUT):
+        # 기존 타이머를 취소하고 timeout초 뒤로 다시 겁니다.
+        if self.timer is not None:
+            self.timer.cancel()
+        self.timer = asyncio.get_running_loop().call_later(timeout, self.expire)
+
+    def refresh(self):
+        # 채널에 사람이 남아 있으면 평소 유휴 시간을, 아무도 없으면 짧은 시간을 겁니다.
+        voice_client = self.voice_client
+        if voice_client and voice_client.channel and not any(not member.bot for member in voice_client.channel.members):
+            self.touch(EMPTY_TIMEOUT)
+        else:
+            self.touch()
+
+    def expire(self):
+        self.timer = None
+        voice_client = self.voice_client
+        busy = voice_client is not None and (voice_client.is_playing() or voice_client.is_paused())
+        if busy or self.moving or len(self.pipeline):
+            # 아직 재생하거나 이동 중이면 끝난 뒤부터 다시 잽니다.
+            self.touch()
+            return
+        asyncio.create_task(self.on_idle(self.guild.id))
+
+    def get_decoder(self, factory):
+        if self.decoder is None:
+            self.decoder = factory()
+        return self.decoder
+
+    async def close(self):
+        """타이머와 대기열을 정리하고, 연결되어 있으면 연결을 끊은 뒤 디코더를 닫습니다."""
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        self.pipeline.clear()
+        voice_client = self.voice_client
+        if voice_client is not None:
+            if voice_client.is_playing():
+                voice_client.stop()
+                logging.info("Stopped playing audio")
+            await voice_client.disconnect()
+            logging.info(f"Disconnected from voice channel in guild {self.guild.id}")
+        if self.decoder is not None:
+            decoder, self.decoder = self.decoder, None
+            await asyncio.to_thread(decoder.close)
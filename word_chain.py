@@ -1,14 +1,42 @@
 import discord
 from discord.ext import commands
 from discord.ui import Button, View, Modal, TextInput
+import asyncio
+import heapq
+import logging
 import random
 import re
+import time
+from collections import OrderedDict
+from hangul import DUEUM_LAW, is_jamo
+from lexicon import load_lexicon
+from word_chain_store import WordChainStore
+
+# 난이도별 봇 전략: 끝 음절 출차수가 낮은 순서로 정렬된 후보 중 앞쪽 몇 %에서 고를지
+# 0이면 항상 가장 받아치기 어려운 단어(출차수가 0인 '한방 단어' 우선)를 고릅니다.
+DIFFICULTIES = {'쉬움': 1.0, '보통': 0.3, '어려움': 0.0}
+DEFAULT_DIFFICULTY = '보통'
+RANDOM_PICK_TRIES = 8  # 무작위로 고른 단어가 이미 사용된 경우 다시 뽑는 횟수
+BEST_MOVE_POOL = 5  # 어려움 난이도에서 출차수가 같은 최선의 단어 중 무작위로 고를 후보 수
+
+# 상태 메시지 갱신 설정
+STATUS_HISTORY_LIMIT = 20  # 상태 메시지에 보여줄 최근 단어 수
+STATUS_MAX_LENGTH = 2000  # 디스코드 메시지 최대 길이
+EMBED_MAX_LENGTH = 4096  # 임베드 설명 최대 길이
+STATUS_UPDATE_DELAY = 0.5  # 이 시간(초) 안에 들어온 갱신은 한 번의 API 호출로 합칩니다.
+STATUS_RETRY_DELAY = 1.0  # 상태 메시지 갱신이 실패했을 때 처음 다시 시도하기까지 기다리는 시간 (초, 실패할 때마다 두 배)
+STATUS_RETRY_LIMIT = 5  # 상태 메시지 갱신을 연속으로 다시 시도하는 최대 횟수
+
+# 메모리에 올려 둘 게임 수 제한. 밀려난 게임도 저장소에 남아 있으므로 다시 접근하면 복원됩니다.
+MAX_LOADED_GAMES = 500
+GAME_IDLE_TIMEOUT = 1800  # 이 시간(초) 동안 아무도 접근하지 않은 게임은 메모리에서 내립니다.
 
 class WordChainModal(Modal):
     def __init__(self, game, ctx):
         super().__init__(title="끝말잇기 단어 입력")
         self.game = game
         self.ctx = ctx
+        self.turn = game.turn  # 입력창을 연 시점의 차례. 그 사이 다른 사람이 먼저 입력했으면 거절합니다.
 
         self.word_input = TextInput(
             label="단어를 입력하세요...",
@@ -21,6 +49,14 @@ class WordChainModal(Modal):
         word = self.word_input.value.strip()
         user = interaction.user.display_name  
 
+        if self.game.turn != self.turn or self.game.lock.locked():
+            await interaction.response.send_message("다른 사람이 먼저 단어를 입력했어요. 현재 단어를 확인하고 다시 시도하세요.", ephemeral=True)
+            return
+
+        async with self.game.lock:
+            await self.play_turn(interaction, word, user)
+
+    async def play_turn(self, interaction, word, user):
         if len(word) < 2:
             await interaction.response.send_message(f"'{word}'은(는) 너무 짧아요. 두 글자 이상의 단어를 입력하세요.", ephemeral=True)
             return
@@ -37,84 +73,267 @@ class WordChainModal(Modal):
             await interaction.response.send_message(f"단어는 '{self.game.current_word[-1]}'로 시작해야 해요. 다시 시도하세요.", ephemeral=True)
             return
 
-        self.game.used_words.append((user, word))
-        self.game.current_word = word
+        self.game.add_used_word(user, word)
 
         bot_word = self.game.next_word(word[-1])
         if bot_word:
-            self.game.used_words.append(('봇', bot_word))
-            self.game.current_word = bot_word
-            await self.game.update_game_status(self.ctx, f"봇의 단어는 '{bot_word}'에요...")
+            self.game.add_used_word('봇', bot_word)
+            if self.game.has_reply(bot_word[-1]):
+                await self.game.update_game_status(self.ctx, f"봇의 단어는 '{bot_word}'에요...")
+            else:
+                # 한방 단어를 받아칠 방법이 없으므로 게임을 열어 두지 않고 바로 끝냅니다.
+                await self.game.end_game(interaction, f"봇의 단어는 '{bot_word}'에요... '{bot_word[-1]}'(으)로 시작하는 단어가 없어서 봇이 승리했어요...", delete_buttons=True)
         else:
             await self.game.end_game(interaction, "봇이 더 이상 단어를 찾을 수 없어요... 사용자가 승리했어요...", delete_buttons=True)
 
         await interaction.response.defer()
 
 class WordChainGame:
-    def __init__(self, word_list):
-        self.word_list = word_list
-        self.used_words = []
+    def __init__(self, lexicon, key=None, store=None, cog=None):
+        self.lexicon = lexicon  # 모든 게임이 공유하는 읽기 전용 사전 (lexicon.Lexicon)
+        self.key = key  # 저장소에서 이 게임을 구분하는 키 (채널 ID)
+        self.store = store  # 게임 이벤트를 기록할 WordChainStore (없으면 저장하지 않음)
+        self.cog = cog
+        self.difficulty = DEFAULT_DIFFICULTY
+        self.used_words = []  # 화면 표시용 (사용자, 단어) 기록
+        self.used_word_set = set()  # 중복 검사용, used_words와 항상 같은 단어를 담습니다.
         self.current_word = None
-        self.active_channel = None
+        self.active_channel_id = None
+        self.turn = 0  # 이벤트가 적용될 때마다 증가하는 차례 번호
+        self.lock = asyncio.Lock()  # 단어 제출을 한 번에 하나씩 처리하기 위한 잠금
+        self.last_active = time.monotonic()
         self.game_message = None
         self.start_message = None
+        self.status_channel = None
+        self.status_note = ""
+        self.status_task = None  # 예약된 상태 메시지 갱신 작업
+        self.status_sending = False  # 상태 메시지를 보내거나 수정하는 중인지
+        self.status_dirty = False  # 아직 상태 메시지에 반영하지 않은 갱신이 있는지
 
     def valid_word(self, word):
         if len(word) < 2:
             return False
         
         original_word = self.apply_dueum_law(word)
-        return (original_word in self.word_list or word in self.word_list) and word not in [w for _, w in self.used_words]
+        return (original_word in self.lexicon or word in self.lexicon) and word not in self.used_word_set
 
-    def apply_dueum_law(self, word):
-        dueum_law_dict = {
-            '녀': '여', '뇨': '요', '뉴': '유', '니': '이',
-            '랴': '야', '려': '여', '례': '예', '료': '요', '류': '유', '리': '이',
-            '라': '나', '래': '내', '로': '노', '뢰': '뇌', '루': '누', '르': '느'
+    def add_used_word(self, user, word):
+        self.record('word', user=user, word=word)
+
+    def reset_words(self):
+        self.used_words = []
+        self.used_word_set = set()
+        self.current_word = None
+
+    def record(self, event_type, **data):
+        # 게임 상태는 모두 이벤트로 바꾸고, 같은 이벤트를 저장소에 덧붙여 재시작 후에 다시 적용합니다.
+        event = {'type': event_type, **data}
+        self.apply_event(event)
+        if self.store is None:
+            return
+        if event_type == 'end':
+            self.store.delete(self.key)
+        else:
+            self.store.append(self.key, event, self.to_snapshot)
+
+    def apply_event(self, event):
+        event_type = event['type']
+        if event_type != 'message':
+            self.turn += 1
+        if event_type == 'start':
+            self.reset_words()
+            self.difficulty = event['difficulty']
+            self.active_channel_id = event['channel_id']
+        elif event_type == 'word':
+            self.used_words.append((event['user'], event['word']))
+            self.used_word_set.add(event['word'])
+            self.current_word = event['word']
+        elif event_type == 'message':
+            if event['kind'] == 'start':
+                self.start_message = self.resolve_message(event['message_id'], self.start_message)
+            else:
+                self.game_message = self.resolve_message(event['message_id'], self.game_message)
+        elif event_type == 'end':
+            self.reset_words()
+            self.active_channel_id = None
+
+    def resolve_message(self, message_id, current):
+        # 재시작 후에는 메시지 ID만 남아 있으므로, 수정·삭제에 쓸 수 있는 PartialMessage로 바꿉니다.
+        if message_id is None or (current is not None and current.id == message_id):
+            return current
+        channel = self.cog.bot.get_channel(self.active_channel_id) if self.cog else None
+        return channel.get_partial_message(message_id) if channel else None
+
+    def to_snapshot(self):
+        return {
+            'channel_id': self.active_channel_id,
+            'difficulty': self.difficulty,
+            'used_words': self.used_words,
+            'start_message_id': self.start_message.id if self.start_message else None,
+            'game_message_id': self.game_message.id if self.game_message else None,
         }
+
+    def restore(self, state, events):
+        if state:
+            self.apply_event({'type': 'start', 'channel_id': state['channel_id'], 'difficulty': state['difficulty']})
+            for user, word in state['used_words']:
+                self.apply_event({'type': 'word', 'user': user, 'word': word})
+            self.apply_event({'type': 'message', 'kind': 'start', 'message_id': state['start_message_id']})
+            self.apply_event({'type': 'message', 'kind': 'status', 'message_id': state['game_message_id']})
+        for event in events:
+            self.apply_event(event)
+
+    def apply_dueum_law(self, word):
         first_char = word[0]
         if len(word) > 1 and self.is_consonant(word[1]):
             return word
-        return dueum_law_dict.get(first_char, first_char) + word[1:]
+        return DUEUM_LAW.get(first_char, first_char) + word[1:]
 
     def is_consonant(self, char):
-        return ord(char) in range(0x3131, 0x318F)
+        return is_jamo(char)
 
     def matches_dueum(self, last_word, first_char):
-        possible_start = self.apply_dueum_law(last_word[-1])
-        return first_char == possible_start or first_char == last_word[-1]
+        last_char = last_word[-1]
+        return first_char == last_char or first_char == DUEUM_LAW.get(last_char, last_char)
+
+    def candidate_ranges(self, last_letter):
+        # 원래 음절과 두음법칙을 적용한 음절로 시작하는 단어들의 사전 순위 구간을 반환
+        modified_last_letter = DUEUM_LAW.get(last_letter, last_letter)
+        syllables = (last_letter,) if modified_last_letter == last_letter else (last_letter, modified_last_letter)
+        ranges = [self.lexicon.prefix_range(syllable) for syllable in syllables]
+        return [(start, end) for start, end in ranges if start < end]
+
+    def has_reply(self, last_letter):
+        # 아직 쓰지 않은 단어가 하나라도 이어질 수 있는지 확인합니다. 사용한 단어 수만큼만 건너뛰면 되므로 금방 끝납니다.
+        for start, end in self.candidate_ranges(last_letter):
+            for position in range(start, end):
+                if self.lexicon[position] not in self.used_word_set:
+                    return True
+        return False
 
     def next_word(self, last_letter):
-        candidates = [word for word in self.word_list if word.startswith(last_letter) and word not in [w for _, w in self.used_words]]
-        if not candidates:
-            modified_last_letter = self.apply_dueum_law(last_letter)
-            candidates = [word for word in self.word_list if word.startswith(modified_last_letter) and word not in [w for _, w in self.used_words]]
-        return random.choice(candidates) if candidates else None
+        ranges = self.candidate_ranges(last_letter)
+        if not ranges:
+            return None
+
+        share = DIFFICULTIES.get(self.difficulty, DIFFICULTIES[DEFAULT_DIFFICULTY])
+        if share > 0:
+            # 순위 앞쪽 share 비율 안에서 무작위로 뽑습니다. 후보 목록을 만들지 않으므로 O(1)입니다.
+            weights = [end - start for start, end in ranges]
+            for _ in range(RANDOM_PICK_TRIES):
+                start, end = random.choices(ranges, weights=weights)[0]
+                position = start + random.randrange(max(1, int((end - start) * share)))
+                _, word = self.lexicon.ranked_word_at(position)
+                if word not in self.used_word_set:
+                    return word
+
+        # 최선의 수: 출차수가 가장 낮은, 아직 쓰지 않은 단어들 중에서 고릅니다.
+        ranked = heapq.merge(*(
+            (self.lexicon.ranked_word_at(position) for position in range(start, end))
+            for start, end in ranges
+        ))
+        best = []
+        for degree, word in ranked:
+            if word in self.used_word_set:
+                continue
+            if best and (degree != best[0][0] or len(best) >= BEST_MOVE_POOL):
+                break
+            best.append((degree, word))
+        return random.choice(best)[1] if best else None
 
     async def update_game_status(self, ctx, additional_message=""):
-        previous_words = self.get_used_words()
-        status_message = f"현재 단어: '{self.current_word}'\n" \
-                         f"다음 단어는 '{self.current_word[-1]}'로 시작해야 해요...\n" \
-                         f"{additional_message}\n\n" \
-                         f"사용된 단어들:\n{previous_words}"
-
+        # 바로 보내지 않고 잠시 모아 두었다가, 마지막 상태만 한 번에 반영합니다.
+        self.status_channel = ctx
+        self.status_note = additional_message
+        self.status_dirty = True
+        if self.status_task is None or self.status_task.done():
+            self.status_task = asyncio.create_task(self.flush_game_status())
+
+    def render_game_status(self):
+        header = f"현재 단어: '{self.current_word}'\n" \
+                 f"다음 단어는 '{self.current_word[-1]}'로 시작해야 해요...\n" \
+                 f"{self.status_note}\n\n" \
+                 f"사용된 단어들:\n"
+        return header + self.get_used_words(STATUS_HISTORY_LIMIT, STATUS_MAX_LENGTH - len(header))
+
+    async def flush_game_status(self):
+        # 보내는 동안 새 갱신이 들어왔으면 한 번 더 보내고, 실패하면 잠시 뒤 다시 시도합니다.
+        # 상태 메시지가 안 보이면 아무도 다음 단어를 낼 수 없으므로 실패한 갱신을 버리지 않습니다.
+        delay = STATUS_UPDATE_DELAY
+        failures = 0
+        while self.status_dirty and self.status_task is asyncio.current_task():
+            await asyncio.sleep(delay)
+            if self.current_word is None:
+                return
+
+            # 여기서부터는 취소하지 않습니다. 보내는 도중에 취소되면 이미 올라간 메시지를 정리할 수 없습니다.
+            self.status_dirty = False
+            self.status_sending = True
+            try:
+                await self.send_game_status()
+                delay = STATUS_UPDATE_DELAY
+                failures = 0
+            except discord.HTTPException as e:
+                failures += 1
+                if failures > STATUS_RETRY_LIMIT:
+                    logging.error(f"Giving up updating word chain status message after {failures} failures: {e}")
+                    return
+                delay = STATUS_RETRY_DELAY * 2 ** (failures - 1)
+                logging.warning(f"Failed to update word chain status message: {e}. Retrying in {delay:.1f}s")
+                self.status_dirty = True
+            finally:
+                self.status_sending = False
+
+    async def send_game_status(self):
+        status_message = self.render_game_status()
         if self.game_message:
             try:
-                await self.game_message.delete()
+                # 기존 상태 메시지를 그 자리에서 수정합니다. 버튼(view)은 그대로 유지됩니다.
+                await self.game_message.edit(content=status_message)
+                return
             except discord.errors.NotFound:
                 self.game_message = None
 
-        self.game_message = await ctx.send(status_message, view=WordChainView(self))
+        self.game_message = await self.status_channel.send(status_message, view=WordChainView(self.cog))
+        self.record('message', kind='status', message_id=self.game_message.id)
 
-    def get_used_words(self):
-        return " > ".join([f"{user}: {word}" for user, word in self.used_words])
+    async def cancel_game_status(self):
+        # 아직 기다리는 중인 갱신은 취소하고, 이미 보내는 중이면 끝날 때까지 기다려
+        # 방금 올라간 상태 메시지도 호출한 쪽에서 정리할 수 있게 합니다.
+        # status_task를 먼저 비우므로 보내던 작업은 이번 전송만 마치고 더 반복하지 않습니다.
+        task, self.status_task = self.status_task, None
+        if task is None or task.done():
+            return
+        if self.status_sending:
+            await asyncio.wait([task])
+        else:
+            task.cancel()
+
+    def get_used_words(self, limit=None, max_length=None):
+        # 최근 단어부터 거꾸로 채워서 limit개, max_length 글자를 넘지 않도록 앞부분을 생략합니다.
+        parts = []
+        length = 0
+        reserve = 20  # 생략 표시를 위한 여유 길이
+        for user, word in reversed(self.used_words):
+            part = f"{user}: {word}"
+            if limit is not None and len(parts) >= limit:
+                break
+            if max_length is not None and length + len(part) + 3 > max_length - reserve:
+                break
+            parts.append(part)
+            length += len(part) + 3
+
+        history = " > ".join(reversed(parts))
+        omitted = len(self.used_words) - len(parts)
+        if omitted:
+            return f"... ({omitted}개 생략) > {history}"
+        return history
 
     async def end_game(self, ctx_or_interaction, additional_message="", delete_buttons=False):
-        self.current_word = None
-        self.active_channel = None
+        await self.cancel_game_status()
 
-        word_list = self.get_used_words()
-        self.used_words = []
+        word_list = self.get_used_words(max_length=EMBED_MAX_LENGTH - len(additional_message) - 20)
+        self.record('end')
 
         embed = self.create_embed("게임 종료", f"{additional_message}\n\n사용된 단어들:\n{word_list}")
 
@@ -150,6 +369,9 @@ class WordChainGame:
                 except discord.errors.NotFound:
                     pass
 
+        self.game_message = None
+        self.start_message = None
+
     def create_embed(self, title, description):
         embed = discord.Embed(title=title, description=description, color=discord.Color.blue())
         return embed
@@ -157,73 +379,110 @@ class WordChainGame:
 class WordChain(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.word_list = self.load_words('words.txt')
-        self.server_games = {}  # 서버별로 게임 상태를 저장할 딕셔너리
+        self.lexicon = self.load_words('words.txt')
+        self.channel_games = OrderedDict()  # 채널별 게임 상태 (오래 접근하지 않은 순서)
+        self.store = WordChainStore()
 
-    def load_words(self, filename):
-        with open(filename, 'r', encoding='utf-8') as file:
-            return [line.strip() for line in file.readlines()]
+    async def cog_load(self):
+        # 재시작 전에 보낸 메시지의 버튼도 계속 동작하도록 영구 뷰로 등록합니다.
+        self.bot.add_view(WordChainStartView(self))
+        self.bot.add_view(WordChainView(self))
 
-    def get_game(self, guild_id):
-        if guild_id not in self.server_games:
-            self.server_games[guild_id] = WordChainGame(self.word_list)
-        return self.server_games[guild_id]
+    def load_words(self, filename):
+        # 미리 컴파일된 사전(words.lex)을 mmap으로 엽니다. 프로세스 안에서는 한 번만 열립니다.
+        return load_lexicon(source=filename)
+
+    def get_game(self, channel_id):
+        game = self.channel_games.get(channel_id)
+        if game is None:
+            game = WordChainGame(self.lexicon, key=channel_id, store=self.store, cog=self)
+            # 재시작 전이나 메모리에서 내려가기 전에 진행 중이던 게임이 있으면 처음 접근할 때 복원합니다.
+            state, events = self.store.load(channel_id)
+            if state or events:
+                game.restore(state, events)
+                logging.info(f"Restored word chain game for channel {channel_id} ({len(game.used_words)} words)")
+            self.channel_games[channel_id] = game
+        else:
+            self.channel_games.move_to_end(channel_id)
+
+        game.last_active = time.monotonic()
+        self.evict_idle_games()
+        return game
+
+    def evict_idle_games(self):
+        # 가장 오래 접근하지 않은 게임부터 살펴보므로, 오래된 게임이 없으면 바로 멈춥니다.
+        now = time.monotonic()
+        for _ in range(len(self.channel_games)):
+            channel_id, game = next(iter(self.channel_games.items()))
+            if len(self.channel_games) <= MAX_LOADED_GAMES and now - game.last_active < GAME_IDLE_TIMEOUT:
+                break
+            if game.lock.locked() or (game.status_task and not game.status_task.done()):
+                # 처리 중인 게임은 내리지 않고 뒤로 보내 다음 기회로 미룹니다.
+                self.channel_games.move_to_end(channel_id)
+                continue
+            del self.channel_games[channel_id]
 
     @commands.command(name='끝말잇기')
-    async def start_game(self, ctx):
-        game = self.get_game(ctx.guild.id)
-        if game.active_channel:
+    async def start_game(self, ctx, difficulty: str = DEFAULT_DIFFICULTY):
+        game = self.get_game(ctx.channel.id)
+        if game.active_channel_id:
             await ctx.send("끝말잇기 게임이 이미 진행 중입니다.")
             return
 
-        game.used_words = []
-        game.current_word = None
-        game.active_channel = ctx.channel
-        view = WordChainStartView(game)
-        game.start_message = await ctx.send("끝말잇기 게임을 시작합니다. 아래 버튼을 사용하세요.", view=view)
+        if difficulty not in DIFFICULTIES:
+            await ctx.send(f"난이도는 {', '.join(DIFFICULTIES)} 중에서 골라주세요.")
+            return
+
+        game.record('start', channel_id=ctx.channel.id, difficulty=difficulty)
+        view = WordChainStartView(self)
+        game.start_message = await ctx.send(f"끝말잇기 게임을 시작합니다. (난이도: {difficulty}) 아래 버튼을 사용하세요.", view=view)
+        game.record('message', kind='start', message_id=game.start_message.id)
 
     @commands.command(name='끝말잇기종료')
     async def manual_end_game(self, ctx):
-        game = self.get_game(ctx.guild.id)
+        game = self.get_game(ctx.channel.id)
         await game.end_game(ctx, "게임이 수동으로 종료되었습니다.", delete_buttons=True)
 
+# 버튼에 고정된 custom_id를 붙이고 게임은 누를 때마다 cog에서 찾으므로, 재시작 후에도 같은 버튼이 동작합니다.
 class WordChainStartView(View):
-    def __init__(self, game):
+    def __init__(self, cog):
         super().__init__(timeout=None)
-        self.game = game
+        self.cog = cog
 
-    @discord.ui.button(label="시작", style=discord.ButtonStyle.success)
+    @discord.ui.button(label="시작", style=discord.ButtonStyle.success, custom_id="word_chain:start")
     async def start(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if interaction.channel != self.game.active_channel:
+        game = self.cog.get_game(interaction.channel.id)
+        if interaction.channel.id != game.active_channel_id:
             await interaction.response.send_message("끝말잇기 게임이 이 채널에서 활성화되지 않았습니다.", ephemeral=True)
             return
 
-        self.game.current_word = random.choice(self.game.word_list)
-        self.game.used_words.append(('봇', self.game.current_word))
-        await self.game.update_game_status(interaction.channel, "게임이 시작되었어요... 단어를 입력하려면 아래 버튼을 클릭하세요...")
+        game.add_used_word('봇', game.lexicon.random_word())
+        await game.update_game_status(interaction.channel, "게임이 시작되었어요... 단어를 입력하려면 아래 버튼을 클릭하세요...")
         await interaction.response.defer()
 
-    @discord.ui.button(label="종료", style=discord.ButtonStyle.danger)
+    @discord.ui.button(label="종료", style=discord.ButtonStyle.danger, custom_id="word_chain:end")
     async def end(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if interaction.channel != self.game.active_channel:
+        game = self.cog.get_game(interaction.channel.id)
+        if interaction.channel.id != game.active_channel_id:
             await interaction.response.send_message("끝말잇기 게임이 이 채널에서 활성화되지 않았습니다.", ephemeral=True)
             return
 
-        await self.game.end_game(interaction, "게임이 종료되었습니다.", delete_buttons=True)
+        await game.end_game(interaction, "게임이 종료되었습니다.", delete_buttons=True)
         await interaction.response.defer()
 
 class WordChainView(View):
-    def __init__(self, game):
+    def __init__(self, cog):
         super().__init__(timeout=None)
-        self.game = game
+        self.cog = cog
 
-    @discord.ui.button(label="단어 입력", style=discord.ButtonStyle.primary)
+    @discord.ui.button(label="단어 입력", style=discord.ButtonStyle.primary, custom_id="word_chain:enter_word")
     async def enter_word(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if interaction.channel != self.game.active_channel:
+        game = self.cog.get_game(interaction.channel.id)
+        if interaction.channel.id != game.active_channel_id:
             await interaction.response.send_message("끝말잇기 게임이 이 채널에서 활성화되지 않았습니다.", ephemeral=True)
             return
 
-        modal = WordChainModal(self.game, interaction.channel)
+        modal = WordChainModal(game, interaction.channel)
         await interaction.response.send_modal(modal)
 
     def disable_all_buttons(self):
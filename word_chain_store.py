@@ -0,0 +1,102 @@
+# word_chain_store.py
+# 진행 중인 끝말잇기 게임을 재시작 후에도 이어갈 수 있도록 디스크에 기록하는 모듈입니다.
+#
+# 게임마다 두 개의 파일을 씁니다.
+#   <key>.journal       : 게임 이벤트를 한 줄에 하나씩 JSON으로 덧붙이는 기록
+#   <key>.snapshot.json : 기록이 일정 길이를 넘으면 그 시점까지의 상태를 압축해 둔 스냅샷
+# 복원할 때는 해당 게임의 스냅샷을 읽고 그 뒤의 기록만 다시 적용하면 됩니다.
+# 이벤트마다 순번을 붙이고 스냅샷에도 마지막으로 담은 순번을 적어 두므로, 스냅샷을 쓴 뒤 기록을
+# 비우기 전에 죽어서 이미 스냅샷에 들어간 이벤트가 기록에 남아 있어도 다시 적용하지 않습니다.
+import json
+import logging
+import os
+
+DATA_DIR = os.getenv('WORD_CHAIN_DATA_DIR', 'word_chain_data')
+SNAPSHOT_INTERVAL = 50  # 기록이 이만큼 쌓이면 스냅샷으로 압축합니다.
+
+
+class WordChainStore:
+    def __init__(self, data_dir=DATA_DIR, snapshot_interval=SNAPSHOT_INTERVAL):
+        self.data_dir = data_dir
+        self.snapshot_interval = snapshot_interval
+        self.journal_lengths = {}  # 게임 키 -> 마지막 스냅샷 이후 기록된 이벤트 수
+        self.sequences = {}  # 게임 키 -> 마지막으로 기록한 이벤트 순번
+        os.makedirs(data_dir, exist_ok=True)
+
+    def journal_path(self, key):
+        return os.path.join(self.data_dir, f"{key}.journal")
+
+    def snapshot_path(self, key):
+        return os.path.join(self.data_dir, f"{key}.snapshot.json")
+
+    def append(self, key, event, snapshot):
+        """이벤트를 기록에 덧붙입니다. 기록이 길어지면 snapshot()으로 현재 상태를 저장하고 기록을 비웁니다."""
+        sequence = self.sequences.get(key, 0) + 1
+        try:
+            with open(self.journal_path(key), 'a', encoding='utf-8') as file:
+                file.write(json.dumps({**event, 'seq': sequence}, ensure_ascii=False) + '\n')
+        except OSError as e:
+            logging.error(f"Error appending word chain event for {key}: {e}")
+            return
+
+        self.sequences[key] = sequence
+        self.journal_lengths[key] = self.journal_lengths.get(key, 0) + 1
+        if self.journal_lengths[key] >= self.snapshot_interval:
+            self.compact(key, snapshot())
+
+    def compact(self, key, state):
+        # 스냅샷을 임시 파일에 쓴 뒤 교체하므로, 중간에 죽어도 이전 스냅샷과 기록이 남아 있습니다.
+        path = self.snapshot_path(key)
+        tmp = f"{path}.tmp"
+        try:
+            with open(tmp, 'w', encoding='utf-8') as file:
+                json.dump({'seq': self.sequences.get(key, 0), 'state': state}, file, ensure_ascii=False)
+            os.replace(tmp, path)
+            open(self.journal_path(key), 'w').close()
+            self.journal_lengths[key] = 0
+        except OSError as e:
+            logging.error(f"Error writing word chain snapshot for {key}: {e}")
+
+    def load(self, key):
+        """(스냅샷 상태, 스냅샷 이후 이벤트 목록)을 반환합니다. 저장된 게임이 없으면 (None, [])입니다."""
+        state = None
+        events = []
+        snapshot_sequence = sequence = 0
+        try:
+            if os.path.exists(self.snapshot_path(key)):
+                with open(self.snapshot_path(key), 'r', encoding='utf-8') as file:
+                    snapshot = json.load(file)
+                state = snapshot['state']
+                snapshot_sequence = sequence = snapshot['seq']
+            if os.path.exists(self.journal_path(key)):
+                with open(self.journal_path(key), 'r', encoding='utf-8') as file:
+                    for line in file:
+                        try:
+                            event = json.loads(line)
+                        except json.JSONDecodeError:
+                            # 마지막 줄이 쓰다 만 상태로 남았을 수 있으므로 건너뜁니다.
+                            logging.warning(f"Skipping broken word chain event for {key}: {line!r}")
+                            continue
+                        event_sequence = event.pop('seq')
+                        if event_sequence <= snapshot_sequence:
+                            continue  # 스냅샷을 쓴 뒤 기록을 비우지 못한 채 종료되어 남은 이벤트
+                        events.append(event)
+                        sequence = event_sequence
+        except (OSError, json.JSONDecodeError, KeyError) as e:
+            logging.error(f"Error loading word chain game {key}: {e}")
+            return None, []
+
+        self.journal_lengths[key] = len(events)
+        self.sequences[key] = sequence
+        return state, events
+
+    def delete(self, key):
+        for path in (self.journal_path(key), self.snapshot_path(key)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logging.error(f"Error removing {path}: {e}")
+        self.journal_lengths.pop(key, None)
+        self.sequences.pop(key, None)